@@ -0,0 +1,110 @@
+"""Login throughput benchmark.
+
+Boots `main.app` in-process and keeps `GET /books` busy while a pool of
+clients saturates `POST /users/jwt/login`. For each password executor mode
+it reports `/books` p50/p99 without and with concurrent logins, and login
+throughput. With `inline` hashing every login stalls the event loop for the
+full argon2 run; with `thread` or `process` `/books` latency stays flat.
+
+    python -m benchmarks.login --database-url sqlite+aiosqlite:///./bench.db --seed
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.run import configure_environment, percentile
+from benchmarks.seed import SEED_PASSWORD, seed, seed_email
+
+
+async def drive(client: httpx.AsyncClient, send, workers: int, deadline: float) -> tuple[list[float], int]:
+    latencies, errors = [], 0
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await send(client, worker_id)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(workers)))
+    return sorted(latencies), errors
+
+
+async def measure(client: httpx.AsyncClient, args: argparse.Namespace, with_logins: bool) -> dict[str, float]:
+    async def read_books(client: httpx.AsyncClient, worker_id: int) -> httpx.Response:
+        return await client.get("/books", params={"size": args.page_size})
+
+    async def log_in(client: httpx.AsyncClient, worker_id: int) -> httpx.Response:
+        email = seed_email(worker_id % args.users)
+        return await client.post("/users/jwt/login", data={"username": email, "password": SEED_PASSWORD})
+
+    deadline = time.perf_counter() + args.duration
+    readers = drive(client, read_books, args.readers, deadline)
+    if with_logins:
+        (books, _), (logins, login_errors) = await asyncio.gather(
+            readers, drive(client, log_in, args.logins, deadline)
+        )
+    else:
+        (books, _), (logins, login_errors) = await readers, ([], 0)
+    return {
+        "books_p50_ms": percentile(books, 50) * 1000,
+        "books_p99_ms": percentile(books, 99) * 1000,
+        "books_rps": len(books) / args.duration,
+        "logins_per_s": len(logins) / args.duration,
+        "login_errors": login_errors,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    configure_environment(args.database_url, "none")
+
+    from main import app
+    from common.settings import get_settings
+    from db.database import Database
+    from services.user.modules.manager import password_hasher
+
+    if args.seed:
+        database = Database(db_url=args.database_url, engine_args={"echo": False})
+        try:
+            print("Seeded", await seed(database, args.users, 2, 20))
+        finally:
+            await database.dispose()
+
+    print(f"{'executor':<10}{'logins':>8}{'books p50':>11}{'books p99':>11}{'books rps':>11}{'logins/s':>10}")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            for executor in args.executors:
+                if executor == "inline":
+                    password_hasher.shutdown()
+                else:
+                    password_hasher.configure(get_settings().auth.model_copy(update={"password_executor": executor}))
+                for with_logins in (False, True):
+                    row = await measure(client, args, with_logins)
+                    print(
+                        f"{executor:<10}{'on' if with_logins else 'off':>8}{row['books_p50_ms']:>11.2f}"
+                        f"{row['books_p99_ms']:>11.2f}{row['books_rps']:>11.1f}{row['logins_per_s']:>10.1f}"
+                    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench.db")
+    parser.add_argument("--seed", action="store_true", help="Seed the database before running")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent GET /books clients")
+    parser.add_argument("--logins", type=int, default=16, help="Concurrent login clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--executors", nargs="+", default=["inline", "thread", "process"],
+                        choices=["inline", "thread", "process"])
+    parser.add_argument("--timeout", type=float, default=60.0)
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
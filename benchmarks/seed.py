@@ -0,0 +1,109 @@
+"""Bulk seeder for benchmark databases.
+
+Creates the schema when missing and inserts users, shelves and books with
+multi-row INSERT ... RETURNING statements built on the regular `models`,
+then fills the denormalized counters.
+
+    python -m benchmarks.seed --database-url sqlite+aiosqlite:///./bench.db --users 100
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from fastapi_users.password import PasswordHelper
+from sqlalchemy import insert, text
+from sqlmodel import SQLModel
+
+from db.database import Database
+from models import Book, Shelf, User
+from services.books.modules.counters import reconcile_counters
+
+SEED_PASSWORD = "benchmark-password"
+SEED_BATCH_SIZE = 5000
+
+
+def seed_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+async def _insert_many(session, model, rows: list[dict]) -> list[int]:
+    ids = []
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        result = await session.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            rows[start:start + SEED_BATCH_SIZE]
+        )
+        ids.extend(result.scalars())
+    return ids
+
+
+async def seed(
+        database: Database,
+        users: int,
+        shelves_per_user: int,
+        books_per_shelf: int
+) -> dict[str, int]:
+    """Insert the requested rows and return how many of each were created."""
+    async with database.engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # The trigram indexes declared on the models need the extension; the
+            # full-text expression index is declared there for Postgres as well.
+            await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+    hashed_password = PasswordHelper().hash(SEED_PASSWORD)
+    created_at = datetime.utcnow() - timedelta(days=1)
+
+    async with database.session_maker() as session:
+        user_ids = await _insert_many(session, User, [
+            dict(
+                first_name="Bench", second_name=str(index), email=seed_email(index),
+                hashed_password=hashed_password, is_active=True, is_verified=True
+            )
+            for index in range(users)
+        ])
+        shelf_rows = [
+            dict(name=f"Shelf {user_id}-{index}", description="Benchmark shelf",
+                 created_at=created_at, user_id=user_id)
+            for user_id in user_ids
+            for index in range(shelves_per_user)
+        ]
+        shelf_ids = await _insert_many(session, Shelf, shelf_rows)
+        book_rows = [
+            dict(name=f"Book {shelf_id}-{index}", description="Benchmark book about testing",
+                 link=None, created_at=created_at + timedelta(microseconds=shelf_id * books_per_shelf + index),
+                 shelf_id=shelf_id, user_id=shelf_rows[position]["user_id"])
+            for position, shelf_id in enumerate(shelf_ids)
+            for index in range(books_per_shelf)
+        ]
+        book_ids = await _insert_many(session, Book, book_rows)
+        await session.commit()
+    await reconcile_counters(database.session_maker, SEED_BATCH_SIZE)
+
+    return {"users": len(user_ids), "shelves": len(shelf_ids), "books": len(book_ids)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    database = Database(db_url=args.database_url, engine_args={"echo": False})
+    started = time.perf_counter()
+    try:
+        counts = await seed(database, args.users, args.shelves_per_user, args.books_per_shelf)
+    finally:
+        await database.dispose()
+    elapsed = time.perf_counter() - started
+    rows = sum(counts.values())
+    print(f"Seeded {counts} in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///./bench.db")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--shelves-per-user", type=int, default=5)
+    parser.add_argument("--books-per-shelf", type=int, default=20)
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,98 @@
+"""Microbenchmark of the list serialization paths.
+
+Seeds an in-memory SQLite database and compares, for one page of books:
+
+* ORM path: `select(Book)` into the identity map, validated through
+  `BookListResponseSchema` and dumped with pydantic;
+* fast path: `BookResponseSchema` columns fetched as row tuples and dumped
+  with `common.serialization.dumps` (orjson when installed).
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from common.schemas import PaginationParams
+from common.serialization import dumps, orjson
+from db.database import Database
+from models import Book, Shelf, User
+from services.books.query_builder import BookQueryBuilder
+from services.books.schemas import BookListResponseSchema
+
+
+async def prepare(rows: int) -> Database:
+    database = Database(db_url="sqlite+aiosqlite://", engine_args={"poolclass": StaticPool})
+    async with database.engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    created_at = datetime.utcnow()
+    async with database.session_maker() as session:
+        await session.execute(insert(User).values(
+            id=1, first_name="Bench", second_name="Mark", email="bench@example.com", hashed_password="-"
+        ))
+        await session.execute(insert(Shelf).values(id=1, name="Shelf", created_at=created_at, user_id=1))
+        await session.execute(insert(Book), [
+            dict(name=f"Book {index}", description="A description long enough to matter " * 3,
+                 link=f"https://example.com/books/{index}", created_at=created_at + timedelta(seconds=index),
+                 shelf_id=1, user_id=1)
+            for index in range(rows)
+        ])
+        await session.commit()
+    return database
+
+
+async def orm_path(database: Database, pagination_params: PaginationParams) -> bytes:
+    async with database.session_maker() as session:
+        books = await BookQueryBuilder.get_books_pagination(session, pagination_params, None)
+        return BookListResponseSchema(items=books).model_dump_json().encode()
+
+
+async def fast_path(database: Database, pagination_params: PaginationParams) -> bytes:
+    async with database.session_maker() as session:
+        books = await BookQueryBuilder.get_books_pagination_rows(session, pagination_params, None)
+        return dumps({"items": [book._asdict() for book in books]})
+
+
+async def measure(path, database: Database, pagination_params: PaginationParams, repeat: int) -> list[float]:
+    await path(database, pagination_params)
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        await path(database, pagination_params)
+        timings.append(time.process_time() - started)
+    return timings
+
+
+async def main(args: argparse.Namespace) -> None:
+    database = await prepare(args.rows)
+    pagination_params = PaginationParams(size=args.rows)
+    try:
+        results = {
+            "orm + pydantic": await measure(orm_path, database, pagination_params, args.repeat),
+            f"rows + {'orjson' if orjson else 'json'}": await measure(fast_path, database, pagination_params, args.repeat),
+        }
+    finally:
+        await database.dispose()
+
+    print(f"{args.rows} books per page, CPU time over {args.repeat} runs")
+    baseline = statistics.median(next(iter(results.values())))
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        print(f"{name:<16} median {median * 1000:8.1f} ms  ({baseline / median:4.1f}x)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
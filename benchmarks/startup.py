@@ -0,0 +1,63 @@
+"""Cold-start benchmark for worker processes.
+
+Imports `main` in fresh interpreters and reports the wall-clock import time,
+plus the slowest modules from `python -X importtime` of the last run.
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def import_main(importtime: bool = False) -> tuple[float, str]:
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", "import main"]
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, env=os.environ.copy())
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"`import main` failed:\n{completed.stderr}")
+    return elapsed, completed.stderr
+
+
+def slowest_imports(importtime_output: str, top: int) -> list[tuple[int, str]]:
+    """Parse `-X importtime` output into `(cumulative_us, module)` pairs, slowest first."""
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        modules.append((int(cumulative), module.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main(args: argparse.Namespace) -> None:
+    import_main()  # warm the filesystem and bytecode caches
+    timings = [import_main()[0] for _ in range(args.runs)]
+    _, importtime_output = import_main(importtime=True)
+
+    print(f"import main: median {statistics.median(timings) * 1000:.1f} ms, "
+          f"min {min(timings) * 1000:.1f} ms, max {max(timings) * 1000:.1f} ms over {args.runs} runs")
+    print(f"\n{'cumulative ms':>14}  module")
+    for cumulative, module in slowest_imports(importtime_output, args.top):
+        print(f"{cumulative / 1000:>14.1f}  {module}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest imports to list")
+    return parser
+
+
+if __name__ == "__main__":
+    main(build_parser().parse_args())
@@ -0,0 +1,115 @@
+"""Microbenchmark of the compiled statement cache for hot lookups.
+
+Seeds an in-memory SQLite database and measures CPU time per call of the
+by-id, by-name, by-user and paginated lookups made through the query
+builders, with the engine's compiled cache disabled and enabled. The
+builders use plain `select(...)`: with the compiled cache (and, on
+asyncpg, the prepared statement cache) in place, lambda statements cost
+more per lookup than they save in statement construction.
+
+    python -m benchmarks.statements --repeat 2000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+
+from common.schemas import PaginationParams
+from db.database import Database
+from models import Book, Shelf, User
+from services.books.query_builder import BookQueryBuilder
+from services.books.schemas import BookFilter
+
+BOOKS = 200
+
+
+async def prepare(query_cache_size: int) -> Database:
+    database = Database(
+        db_url="sqlite+aiosqlite://",
+        engine_args={"poolclass": StaticPool, "query_cache_size": query_cache_size}
+    )
+    async with database.engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+    created_at = datetime.utcnow()
+    async with database.session_maker() as session:
+        await session.execute(insert(User).values(
+            id=1, first_name="Bench", second_name="Mark", email="bench@example.com", hashed_password="-"
+        ))
+        await session.execute(insert(Shelf).values(id=1, name="Shelf", created_at=created_at, user_id=1))
+        await session.execute(insert(Book), [
+            dict(name=f"Book {index}", created_at=created_at + timedelta(seconds=index), shelf_id=1, user_id=1)
+            for index in range(BOOKS)
+        ])
+        await session.commit()
+    return database
+
+
+def print_table(title: str, results: dict[str, dict[str, float]]) -> None:
+    print(title)
+    lookups = list(next(iter(results.values())))
+    print(f"{'':<18}" + "".join(f"{name:>12}" for name in lookups))
+    for variant, timings in results.items():
+        print(f"{variant:<18}" + "".join(f"{timings[name] * 1e6:12.0f}" for name in lookups))
+    print()
+
+
+def builder_lookups(session):
+    async def by_id(index: int):
+        return await BookQueryBuilder.get_book_by_id(session, index % BOOKS + 1)
+
+    async def by_name(index: int):
+        return await BookQueryBuilder.get_book_by_name(session, f"Book {index % BOOKS}")
+
+    async def by_user(index: int):
+        return await BookQueryBuilder.get_books_by_user(session, 1, PaginationParams(page=index % 4, size=20))
+
+    async def paginated(index: int):
+        filters = BookFilter(name=f"{index % 10}")
+        return await BookQueryBuilder.get_books_pagination(session, PaginationParams(page=0, size=20), filters)
+
+    return {"by id": by_id, "by name": by_name, "by user": by_user, "paginated": paginated}
+
+
+async def measure(database: Database, lookups, repeat: int) -> dict[str, float]:
+    results = {}
+    async with database.session_maker() as session:
+        for name, lookup in lookups(session).items():
+            await lookup(0)
+            timings = []
+            for index in range(repeat):
+                started = time.process_time()
+                await lookup(index)
+                timings.append(time.process_time() - started)
+                session.expunge_all()
+            results[name] = statistics.median(timings)
+    return results
+
+
+async def main(args: argparse.Namespace) -> None:
+    uncached, cached = await prepare(0), await prepare(args.query_cache_size)
+    try:
+        results = {
+            "no cache": await measure(uncached, builder_lookups, args.repeat),
+            "compiled cache": await measure(cached, builder_lookups, args.repeat),
+        }
+    finally:
+        await uncached.dispose()
+        await cached.dispose()
+
+    print_table(f"Median CPU time per lookup over {args.repeat} calls, including execution (us)", results)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--query-cache-size", type=int, default=1200)
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
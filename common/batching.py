@@ -0,0 +1,30 @@
+from typing import Any, Iterable
+
+from sqlalchemy import ColumnElement, Integer, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.errors import InvalidIds
+
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(raw: str) -> list[int]:
+    """Parse a comma-separated `ids` query value, dropping duplicates but keeping order."""
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(",") if part.strip()))
+    except ValueError as e:
+        raise InvalidIds("ids must be comma-separated integers") from e
+    if not ids:
+        raise InvalidIds("ids must not be empty")
+    if len(ids) > MAX_BATCH_IDS:
+        raise InvalidIds(f"At most {MAX_BATCH_IDS} ids can be requested at once")
+    return ids
+
+
+def id_in(session: AsyncSession, column: Any, ids: Iterable[int]) -> ColumnElement[bool]:
+    """`column = ANY(:ids)` on Postgres: one statement and one prepared plan for any number of ids."""
+    ids = list(ids)
+    if session.get_bind().dialect.name == "postgresql":
+        return column == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+    return column.in_(ids)
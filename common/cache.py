@@ -0,0 +1,189 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from common.jobs import job_queue
+from common.settings import CacheSettings
+
+
+class TTLCache:
+    """In-process LRU cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or `None`, counting the lookup as a hit or a miss."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCacheBackend:
+    """Per-process cache backend built on `TTLCache`.
+
+    Invalidations are not shared between processes, so settings reject it
+    when `server.workers` is above one.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 30.0) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        self._cache.set(key, value)
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+class RedisCacheBackend:
+    """Cache backend for any server speaking the Redis protocol (Redis, Valkey, KeyDB, ...)."""
+
+    def __init__(self, url: str, ttl: float = 30.0, prefix: str = "bookapi:") -> None:
+        try:
+            from redis import asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis cache backend requires the `redis` package") from e
+        self._client = redis.from_url(url)
+        self._ttl = ttl
+        self._prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = await self._client.get(self._prefix + key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self._client.set(self._prefix + key, value, px=int(self._ttl * 1000))
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self._client.get(self._prefix + key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(self._prefix + key)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class ResponseCache:
+    """Caches serialized responses per namespace.
+
+    Invalidating a namespace bumps its generation counter, which is part of
+    every key, so all entries of that namespace become unreachable at once
+    and age out of the backend on their own.
+    """
+
+    def __init__(self, backend: Optional[MemoryCacheBackend | RedisCacheBackend] = None) -> None:
+        self.backend = backend
+
+    def configure(self, backend: Optional[MemoryCacheBackend | RedisCacheBackend]) -> None:
+        self.backend = backend
+
+    async def generation(self, namespace: str) -> int:
+        if self.backend is None:
+            return 0
+        return await self.backend.get_counter(f"gen:{namespace}")
+
+    async def get(self, namespace: str, params: str, generation: Optional[int] = None) -> Optional[bytes]:
+        if self.backend is None:
+            return None
+        if generation is None:
+            generation = await self.generation(namespace)
+        return await self.backend.get(f"{namespace}:{generation}:{params}")
+
+    async def set(self, namespace: str, params: str, value: bytes, generation: Optional[int] = None) -> None:
+        """Store `value`; pass the `generation` read before building it so a concurrent invalidation wins."""
+        if self.backend is None:
+            return
+        if generation is None:
+            generation = await self.generation(namespace)
+        await self.backend.set(f"{namespace}:{generation}:{params}", value)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        if self.backend is None:
+            return
+        for namespace in namespaces:
+            await self.backend.incr(f"gen:{namespace}")
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+
+def create_cache_backend(settings: CacheSettings) -> Optional[MemoryCacheBackend | RedisCacheBackend]:
+    if settings.backend == "redis":
+        return RedisCacheBackend(settings.redis_url, ttl=settings.ttl)
+    if settings.backend == "memory":
+        return MemoryCacheBackend(maxsize=settings.max_entries, ttl=settings.ttl)
+    return None
+
+
+response_cache = ResponseCache()
+
+
+@job_queue.task("cache.invalidate", durable=False)
+async def invalidate_responses(namespaces: list[str]) -> None:
+    await response_cache.invalidate(*namespaces)
+
+
+async def schedule_invalidation(*namespaces: str) -> None:
+    """Bump namespace generations after a write.
+
+    An in-process backend is bumped right away, so the next read cannot see
+    the old generation. Redis round trips are left to a background worker.
+    """
+    if isinstance(response_cache.backend, RedisCacheBackend):
+        await job_queue.enqueue("cache.invalidate", namespaces=list(namespaces))
+    else:
+        await response_cache.invalidate(*namespaces)
@@ -0,0 +1,209 @@
+import time
+import zlib
+from typing import Callable, Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.metrics import registry
+from common.settings import CompressionSettings, get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+compression_bytes_in = registry.counter(
+    "http_compression_bytes_in_total", "Response bytes before compression", ["encoding"]
+)
+compression_bytes_out = registry.counter(
+    "http_compression_bytes_out_total", "Response bytes after compression", ["encoding"]
+)
+compression_cpu_seconds = registry.counter(
+    "http_compression_cpu_seconds_total", "CPU time spent compressing responses", ["encoding"]
+)
+
+SCOPE_LEVELS_KEY = "compression_levels"
+
+
+class _GzipStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = brotli.Compressor(quality=level)
+        # `brotli` names it process(), `brotlicffi` compress().
+        self._process = getattr(self._compressor, "process", None) or self._compressor.compress
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._process(data) + self._compressor.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level: int) -> None:
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+STREAMS = {"gzip": _GzipStream}
+if brotli is not None:
+    STREAMS["br"] = _BrotliStream
+if zstandard is not None:
+    STREAMS["zstd"] = _ZstdStream
+
+
+def negotiate(accept_encoding: str, available: list[str]) -> Optional[str]:
+    """Pick the encoding with the highest `q` in `Accept-Encoding`, ties going to `available` order."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding] = weight
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compression_levels(gzip: Optional[int] = None, br: Optional[int] = None, zstd: Optional[int] = None) -> Callable:
+    """Route dependency overriding the configured levels for one route; 0 disables an encoding.
+
+        @router.get("/export", dependencies=[Depends(compression_levels(gzip=1, br=1, zstd=1))])
+    """
+    overrides = {coding: level for coding, level in (("gzip", gzip), ("br", br), ("zstd", zstd)) if level is not None}
+
+    def set_levels(request: Request) -> None:
+        request.scope.setdefault(SCOPE_LEVELS_KEY, {}).update(overrides)
+
+    return set_levels
+
+
+class CompressionMiddleware:
+    """Compress JSON and text responses with zstd, brotli or gzip, as negotiated from `Accept-Encoding`.
+
+    Complete bodies under `minimum_size` are sent as is. Streamed bodies are
+    compressed chunk by chunk and flushed after each one, so clients keep
+    receiving data as it is produced. brotli and zstd are used when their
+    packages are installed.
+    """
+
+    def __init__(self, app: ASGIApp, settings: Optional[CompressionSettings] = None) -> None:
+        self.app = app
+        self._settings = settings
+
+    @property
+    def settings(self) -> CompressionSettings:
+        if self._settings is None:
+            self._settings = get_settings().compression
+        return self._settings
+
+    def _level(self, scope: Scope, coding: str) -> int:
+        overrides = scope.get(SCOPE_LEVELS_KEY, {})
+        if coding in overrides:
+            return overrides[coding]
+        settings = self.settings
+        return {"gzip": settings.gzip_level, "br": settings.brotli_quality, "zstd": settings.zstd_level}[coding]
+
+    def _compressible(self, message: Message, headers: MutableHeaders) -> bool:
+        if message["status"] < 200 or message["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return any(content_type.startswith(media_type) for media_type in self.settings.media_types)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD" or not self.settings.enabled:
+            await self.app(scope, receive, send)
+            return
+        available = [coding for coding in self.settings.encodings if coding in STREAMS]
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""), available)
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        stream = None
+        passthrough = False
+
+        def compress(data: bytes, more_body: bool) -> bytes:
+            started = time.thread_time()
+            compressed = stream.chunk(data) if more_body else stream.finish(data)
+            compression_cpu_seconds.inc(time.thread_time() - started, encoding=coding)
+            compression_bytes_in.inc(len(data), encoding=coding)
+            compression_bytes_out.inc(len(compressed), encoding=coding)
+            return compressed
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, stream, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                start_message, start = start, None
+                headers = MutableHeaders(scope=start_message)
+                level = self._level(scope, coding)
+                if (not level or not self._compressible(start_message, headers)
+                        or (not more_body and len(body) < self.settings.minimum_size)):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                stream = STREAMS[coding](level)
+                body = compress(body, more_body)
+                headers["Content-Encoding"] = coding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = f"W/{etag}"
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start_message)
+            else:
+                body = compress(body, more_body)
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,2 +1,8 @@
 class EmptyQueryResult(Exception):
-    """Class represents exception when query result is empty."""
\ No newline at end of file
+    """Class represents exception when query result is empty."""
+
+class InvalidCursor(Exception):
+    """Class represents exception when a pagination cursor cannot be decoded."""
+
+class InvalidIds(Exception):
+    """Class represents exception when a batch of IDs is malformed or too large."""
@@ -0,0 +1,55 @@
+import csv
+import io
+from enum import Enum
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from common.serialization import dumps
+from db.database import DatabaseSession
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _encode_ndjson(fields: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    return b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+def _encode_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+        session_maker: async_sessionmaker,
+        select_query: Select,
+        export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """Stream the rows of `select_query` through a server-side cursor, one batch at a time.
+
+    The session is opened inside the generator so it stays alive for as long
+    as the response body is being sent.
+    """
+    async with DatabaseSession(session_maker=session_maker) as db:
+        result = await db.session.stream(select_query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        fields = list(result.keys())
+        if export_format == ExportFormat.csv:
+            yield _encode_csv([fields])
+        async for rows in result.partitions():
+            if export_format == ExportFormat.csv:
+                yield _encode_csv(rows)
+            else:
+                yield _encode_ndjson(fields, rows)
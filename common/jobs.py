@@ -0,0 +1,278 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from common.metrics import registry
+from common.settings import JobSettings
+from models.jobs import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[..., Awaitable[None]]
+
+jobs_enqueued_total = registry.counter("jobs_enqueued_total", "Background jobs enqueued", ["job"])
+jobs_completed_total = registry.counter("jobs_completed_total", "Background jobs completed", ["job"])
+jobs_retried_total = registry.counter("jobs_retried_total", "Background job attempts that were retried", ["job"])
+jobs_failed_total = registry.counter("jobs_failed_total", "Background jobs that exhausted their retries", ["job"])
+jobs_queue_depth = registry.gauge("jobs_queue_depth", "Background jobs waiting for a worker")
+
+
+@dataclass
+class Job:
+    name: str
+    payload: dict[str, Any] = field(default_factory=dict)
+    id: Optional[int] = None
+
+
+@dataclass
+class _Task:
+    handler: JobHandler
+    durable: bool
+
+
+class SQLJobStore:
+    """Persists durable jobs in `background_jobs` so they survive a restart.
+
+    All worker processes share the table, so a row only runs in the process
+    holding its lease. `add` leases the new row to the enqueuing process.
+    `claim` takes pending rows and rows whose lease ran out because their
+    process died. Holders `renew` their leases until the job is done. Rows are
+    deleted once the job succeeds and kept with status `failed` once it runs
+    out of retries.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker, lease_seconds: float = 60.0) -> None:
+        self._session_maker = session_maker
+        self.lease_seconds = lease_seconds
+
+    def _lease_until(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+
+    async def add(self, job: Job) -> int:
+        async with self._session_maker() as session:
+            row = BackgroundJob(name=job.name, payload=job.payload, status="running", lease_until=self._lease_until())
+            session.add(row)
+            await session.commit()
+            return row.id
+
+    async def claim(self, limit: int) -> list[Job]:
+        """Atomically lease up to `limit` pending or abandoned jobs to this process."""
+        claimable = (
+            select(BackgroundJob.id)
+            .where(or_(
+                BackgroundJob.status == "pending",
+                and_(BackgroundJob.status == "running", BackgroundJob.lease_until < datetime.now(timezone.utc)),
+            ))
+            .order_by(BackgroundJob.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with self._session_maker() as session:
+            result = await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id.in_(claimable))
+                .values(status="running", lease_until=self._lease_until())
+                .returning(BackgroundJob.id, BackgroundJob.name, BackgroundJob.payload)
+                .execution_options(synchronize_session=False)
+            )
+            jobs = sorted((Job(name=row.name, payload=row.payload, id=row.id) for row in result), key=lambda job: job.id)
+            await session.commit()
+            return jobs
+
+    async def renew(self, ids: Iterable[int]) -> None:
+        async with self._session_maker() as session:
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id.in_(list(ids)), BackgroundJob.status == "running")
+                .values(lease_until=self._lease_until())
+            )
+            await session.commit()
+
+    async def release(self, ids: Iterable[int]) -> None:
+        """Hand jobs this process will not run back to the other workers."""
+        async with self._session_maker() as session:
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id.in_(list(ids)), BackgroundJob.status == "running")
+                .values(status="pending", lease_until=None)
+            )
+            await session.commit()
+
+    async def complete(self, job: Job) -> None:
+        async with self._session_maker() as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.id == job.id))
+            await session.commit()
+
+    async def fail(self, job: Job, attempts: int, error: str) -> None:
+        async with self._session_maker() as session:
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job.id)
+                .values(status="failed", attempts=attempts, last_error=error)
+            )
+            await session.commit()
+
+
+class JobQueue:
+    """In-process asyncio work queue with bounded concurrency, retries and backpressure.
+
+    `enqueue` waits while the queue is full, so producers slow down instead of
+    piling up unbounded work. Until `start` is called (scripts, benchmarks)
+    jobs run inline.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, _Task] = {}
+        self._queue: Optional[asyncio.Queue[Job]] = None
+        self._workers: list[asyncio.Task] = []
+        self._store: Optional[SQLJobStore] = None
+        self._leases: Optional[asyncio.Task] = None
+        self._leased: set[int] = set()
+        self._settings = JobSettings()
+
+    def task(self, name: str, durable: bool = True) -> Callable[[JobHandler], JobHandler]:
+        """Register a handler; its keyword arguments must be JSON-serializable when durable."""
+        def register(handler: JobHandler) -> JobHandler:
+            self._tasks[name] = _Task(handler, durable)
+            return handler
+        return register
+
+    @property
+    def running(self) -> bool:
+        return self._queue is not None
+
+    async def start(self, settings: JobSettings, store: Optional[SQLJobStore] = None) -> None:
+        self._settings = settings
+        self._store = store
+        self._queue = asyncio.Queue(maxsize=settings.max_queue_size)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(settings.concurrency)]
+        if store is not None:
+            await self._claim()
+            self._leases = asyncio.create_task(self._maintain_leases())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Drain queued jobs for up to `timeout` seconds, then stop the workers.
+
+        Durable jobs still queued are released for other processes to claim.
+        """
+        if self._queue is None:
+            return
+        if self._leases is not None:
+            self._leases.cancel()
+            await asyncio.gather(self._leases, return_exceptions=True)
+            self._leases = None
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping with {self._queue.qsize()} background jobs still queued")
+        unstarted = []
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if job.id is not None:
+                unstarted.append(job.id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        if unstarted:
+            await self._store.release(unstarted)
+        self._queue, self._workers, self._leased = None, [], set()
+
+    async def _claim(self) -> None:
+        free = self._queue.maxsize - self._queue.qsize()
+        if free <= 0:
+            return
+        for job in await self._store.claim(free):
+            self._leased.add(job.id)
+            await self._queue.put(job)
+        jobs_queue_depth.set(self._queue.qsize())
+
+    async def _maintain_leases(self) -> None:
+        """Renew the leases of queued and running jobs and pick up abandoned ones."""
+        while True:
+            await asyncio.sleep(self._store.lease_seconds / 3)
+            try:
+                if self._leased:
+                    await self._store.renew(set(self._leased))
+                await self._claim()
+            except Exception:
+                logger.exception("Failed to renew or claim background job leases")
+
+    async def enqueue(self, name: str, **payload: Any) -> None:
+        if name not in self._tasks:
+            raise KeyError(f"Unknown background job {name!r}")
+        job = Job(name, payload)
+        jobs_enqueued_total.inc(job=name)
+        if self._queue is None:
+            await self._run(job)
+            return
+        if self._store is not None and self._tasks[name].durable:
+            job.id = await self._store.add(job)
+            self._leased.add(job.id)
+        await self._queue.put(job)
+        jobs_queue_depth.set(self._queue.qsize())
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            jobs_queue_depth.set(self._queue.qsize())
+            try:
+                await self._run(job)
+            except Exception:
+                # Never let one job take its worker down with it: concurrency would shrink for good.
+                logger.exception(f"Background job {job.name} could not be run")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        task = self._tasks.get(job.name)
+        if task is None:
+            # A durable row enqueued by a build that registered a task this one does not have.
+            jobs_failed_total.inc(job=job.name)
+            logger.error(f"Background job {job.name} is not registered in this process")
+            if job.id is not None:
+                await self._record(job, "fail", 0, "Unknown background job")
+            return
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                await task.handler(**job.payload)
+            except Exception as e:
+                if attempts > self._settings.max_retries:
+                    jobs_failed_total.inc(job=job.name)
+                    logger.exception(f"Background job {job.name} failed after {attempts} attempts")
+                    if job.id is not None:
+                        await self._record(job, "fail", attempts, repr(e))
+                    return
+                jobs_retried_total.inc(job=job.name)
+                await asyncio.sleep(self._settings.retry_backoff * 2 ** (attempts - 1))
+            else:
+                jobs_completed_total.inc(job=job.name)
+                if job.id is not None:
+                    await self._record(job, "complete")
+                return
+
+    async def _record(self, job: Job, outcome: str, *args: Any) -> None:
+        """Store a durable job's outcome, retrying transient errors.
+
+        The lease is dropped even when the store stays unreachable; the row is
+        then claimed again once the lease runs out.
+        """
+        try:
+            for attempt in range(self._settings.max_retries + 1):
+                try:
+                    await getattr(self._store, outcome)(job, *args)
+                    return
+                except Exception:
+                    logger.exception(f"Could not record background job {job.id} as {outcome}")
+                    await asyncio.sleep(self._settings.retry_backoff * 2 ** attempt)
+        finally:
+            self._leased.discard(job.id)
+
+
+job_queue = JobQueue()
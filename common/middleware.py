@@ -0,0 +1,84 @@
+import json
+import logging
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from common.metrics import registry
+from db.instrumentation import QueryStats, start_query_stats, stop_query_stats
+
+logger = logging.getLogger(__name__)
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests served", ["method", "route", "status"]
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries", "SQL statements per HTTP request", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100)
+)
+http_request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL per HTTP request", ["method", "route"]
+)
+
+
+def _server_timing(stats: QueryStats, elapsed: float) -> str:
+    return (
+        f'db;dur={stats.total_time * 1000:.2f};desc="{stats.count} queries", '
+        f'db-slowest;dur={stats.slowest_time * 1000:.2f}, '
+        f'app;dur={elapsed * 1000:.2f}'
+    )
+
+
+class RequestInstrumentationMiddleware:
+    """Collect per-request SQL statistics.
+
+    Query count, total DB time and the slowest statement are sent as a
+    `Server-Timing` header, logged as one JSON line per request and recorded
+    in the metrics registry.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start_query_stats()
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", _server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - started
+            stop_query_stats(token)
+            method = scope["method"]
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_requests_total.inc(method=method, route=route, status=str(status_code))
+            http_request_duration.observe(elapsed, method=method, route=route)
+            http_request_db_queries.observe(stats.count, method=method, route=route)
+            http_request_db_duration.observe(stats.total_time, method=method, route=route)
+            logger.info(json.dumps({
+                "method": method,
+                "route": route,
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "db_queries": stats.count,
+                "db_ms": round(stats.total_time * 1000, 2),
+                "db_slowest_ms": round(stats.slowest_time * 1000, 2),
+                "db_slowest_statement": (stats.slowest_statement or "")[:500] or None,
+            }))
@@ -0,0 +1,42 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+from sqlalchemy import Select, tuple_
+
+from common.errors import InvalidCursor
+from common.schemas import PaginationParams
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a `(created_at, id)` keyset position as an opaque token."""
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a token produced by `encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor from e
+
+
+def apply_pagination(select_query: Select, model: Any, pagination_params: PaginationParams) -> Select:
+    """Order by `(created_at, id)` and page either by keyset cursor or by offset."""
+    select_query = select_query.order_by(model.created_at, model.id).limit(pagination_params.size)
+    if pagination_params.after:
+        created_at, row_id = decode_cursor(pagination_params.after)
+        return select_query.where(tuple_(model.created_at, model.id) > (created_at, row_id))
+    return select_query.offset(pagination_params.page * pagination_params.size)
+
+
+def get_next_cursor(items: Sequence[Any], pagination_params: PaginationParams) -> str | None:
+    """Return the cursor of the last item when the page is full."""
+    if len(items) < pagination_params.size:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
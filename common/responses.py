@@ -0,0 +1,72 @@
+import hashlib
+from typing import Awaitable, Callable
+from urllib.parse import urlencode
+
+from fastapi import Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+
+from common.cache import response_cache
+from db.database import DatabaseSession, get_database, is_pinned_to_primary
+
+
+def normalize_query(request: Request) -> str:
+    """Return the request path with its query parameters sorted, so equivalent URLs share a key."""
+    params = sorted((key, value) for key, value in request.query_params.multi_items() if value != "")
+    return f"{request.url.path}?{urlencode(params)}"
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def _build_body(build: Callable[[AsyncSession], Awaitable[SQLModel | bytes]], session: AsyncSession) -> bytes:
+    body = await build(session)
+    if isinstance(body, SQLModel):
+        body = body.model_dump_json().encode()
+    return body
+
+
+async def cached_response(
+        request: Request,
+        namespace: str,
+        session: AsyncSession,
+        build: Callable[[AsyncSession], Awaitable[SQLModel | bytes]]
+) -> Response:
+    """Serve a JSON response from `response_cache`, building and storing it on a miss.
+
+    `build` queries the session it is given and returns either a schema
+    instance or an already serialized body. `session` is the route's read
+    session. It serves uncached requests and clients pinned to the primary
+    after a write, which bypass the cache. Misses are built from the primary:
+    a lagging replica could otherwise store a pre-write body under the new
+    generation for the whole TTL. Responses carry an `ETag`; a matching
+    `If-None-Match` gets an empty 304.
+    """
+    database = get_database(request)
+    if response_cache.backend is None or (database.has_replicas and is_pinned_to_primary(request)):
+        body = await _build_body(build, session)
+    else:
+        key = normalize_query(request)
+        generation = await response_cache.generation(namespace)
+        body = await response_cache.get(namespace, key, generation)
+        if body is None:
+            if database.has_replicas:
+                async with DatabaseSession(session_maker=database.session_maker) as db:
+                    body = await _build_body(build, db.session)
+            else:
+                body = await _build_body(build, session)
+            await response_cache.set(namespace, key, body, generation)
+
+    etag = make_etag(body)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
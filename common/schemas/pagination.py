@@ -3,4 +3,5 @@ from sqlmodel import SQLModel, Field
 
 class PaginationParams(SQLModel):
     page: int = Field(default=0, ge=0)
-    size: int = Field(default=100, gt=1, lt=100000)
\ No newline at end of file
+    size: int = Field(default=100, gt=1, lt=100000)
+    after: str | None = Field(default=None, description="Opaque cursor returned as next_cursor")
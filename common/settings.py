@@ -1,15 +1,17 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Literal, TypeVar
 
-from pydantic import BaseModel, SecretStr, Field
+from pydantic import BaseModel, SecretStr, Field, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from sqlalchemy.engine import URL
 
 
 class DatabaseSettings(BaseModel):
-    host: str
-    port: int
+    host: str | None = None
+    port: int | None = None
     db: str
-    user: SecretStr = Field(exclude=True, repr=False)
+    user: SecretStr | None = Field(default=None, exclude=True, repr=False)
     password: SecretStr | None = Field(
         default=None,
         exclude=True,
@@ -17,18 +19,73 @@ class DatabaseSettings(BaseModel):
     )
     engine: str
     debug: bool
+    pool_size: int = Field(default=10, ge=1)
+    max_overflow: int = Field(default=20, ge=0)
+    pool_pre_ping: bool = True
+    pool_recycle: int = Field(default=1800, description="Seconds before a pooled connection is recycled")
+    query_cache_size: int = Field(default=1200, ge=0, description="Compiled statements kept per engine")
+    prepared_statement_cache_size: int = Field(
+        default=500,
+        ge=0,
+        description="Server-side prepared statements kept per asyncpg connection"
+    )
+    slow_query_threshold: float | None = Field(
+        default=0.5,
+        description="Seconds after which a statement is logged as slow; unset to disable"
+    )
+    explain_slow_queries: bool = False
+    replicas: list[str] = Field(default_factory=list, description="Read replica hosts, as host or host:port")
+    replica_health_interval: float = Field(default=5, gt=0)
+    read_your_writes_window: float = Field(
+        default=5,
+        ge=0,
+        description="Seconds a client keeps reading from the primary after a write"
+    )
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.engine.startswith("sqlite")
 
-    def get_url(self, password: SecretStr | None = None) -> URL:
+    def get_engine_args(self) -> dict:
+        if self.is_sqlite:
+            return dict(echo=self.debug, query_cache_size=self.query_cache_size)
+        return dict(
+            echo=self.debug,
+            query_cache_size=self.query_cache_size,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_pre_ping=self.pool_pre_ping,
+            pool_recycle=self.pool_recycle
+        )
+
+    def get_url(self, password: SecretStr | None = None, host: str | None = None) -> URL:
+        if self.is_sqlite:
+            return URL.create(drivername=self.engine, database=self.db)
         password = password or self.password
+        port = self.port
+        if host and ":" in host:
+            host, replica_port = host.rsplit(":", 1)
+            port = int(replica_port)
         return URL.create(
             drivername=self.engine,
-            username=self.user.get_secret_value(),
+            username=self.user.get_secret_value() if self.user else None,
             password=password.get_secret_value() if isinstance(password, SecretStr) else password,
-            host=self.host,
-            port=self.port,
-            database=self.db
+            host=host or self.host,
+            port=port,
+            database=self.db,
+            query=self._get_driver_query()
         )
 
+    def _get_driver_query(self) -> dict[str, str]:
+        if "asyncpg" in self.engine:
+            return {"prepared_statement_cache_size": str(self.prepared_statement_cache_size)}
+        return {}
+
+    def get_replica_urls(self) -> list[URL]:
+        if self.is_sqlite:
+            return []
+        return [self.get_url(host=replica) for replica in self.replicas]
+
 
 class DefaultSettings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -49,8 +106,98 @@ class AuthSettings(BaseModel):
     reset_password_token_secret: SecretStr
     verification_token_secret: SecretStr
     jwt_strategy_token_secret: SecretStr
+    user_cache_size: int = Field(default=10000, ge=0)
+    user_cache_ttl: float = Field(default=60, ge=0, description="Seconds a resolved user stays cached")
+    password_executor: Literal["thread", "process"] = Field(
+        default="process",
+        description="`thread` keeps hashing off the event loop but still competes with requests for the GIL "
+                    "and CPU, so latency under login load is only flat with `process`"
+    )
+    password_workers: int | None = Field(
+        default=None,
+        ge=1,
+        description="Concurrent password hashes per app worker; defaults to the CPU cores divided by server.workers"
+    )
+
+
+class CacheSettings(BaseModel):
+    backend: Literal["memory", "redis", "none"] = "memory"
+    ttl: float = Field(default=30, gt=0, description="Seconds a cached response is served")
+    max_entries: int = Field(default=10000, ge=1)
+    redis_url: str = "redis://localhost:6379/0"
+
+
+class ServerSettings(BaseModel):
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int | None = Field(default=None, ge=1, description="Defaults to the number of CPU cores")
+    db_connection_budget: int = Field(
+        default=100,
+        ge=1,
+        description="Upper bound on connections per database host across all workers"
+    )
+    graceful_timeout: float = Field(default=30, ge=0, description="Seconds to drain requests on SIGTERM")
+    keepalive: int = Field(default=5, ge=0)
+
+
+class CompressionSettings(BaseModel):
+    enabled: bool = True
+    minimum_size: int = Field(default=1024, ge=0, description="Smaller complete bodies are sent uncompressed")
+    encodings: list[Literal["zstd", "br", "gzip"]] = Field(
+        default=["zstd", "br", "gzip"],
+        description="Server preference among the encodings a client accepts equally"
+    )
+    gzip_level: int = Field(default=6, ge=0, le=9)
+    brotli_quality: int = Field(default=4, ge=0, le=11)
+    zstd_level: int = Field(default=3, ge=0, le=22)
+    media_types: list[str] = ["application/json", "application/x-ndjson", "text/"]
+
+
+class ChangeFeedSettings(BaseModel):
+    page_size: int = Field(default=500, ge=1, le=5000)
+    settle_seconds: float = Field(
+        default=2.0,
+        ge=0,
+        description="Changes younger than this are held back so late commits cannot land behind a token"
+    )
+    poll_interval: float = Field(default=1.0, gt=0, description="Seconds between polls of an open change stream")
+    stream_timeout: float = Field(default=30.0, gt=0, description="Seconds before a change stream asks the client to reconnect")
+
+
+class JobSettings(BaseModel):
+    concurrency: int = Field(default=4, ge=1)
+    max_queue_size: int = Field(default=1000, ge=1, description="Enqueueing waits once this many jobs are queued")
+    max_retries: int = Field(default=3, ge=0)
+    retry_backoff: float = Field(default=0.5, ge=0, description="Base delay in seconds, doubled on every retry")
+    durable: bool = Field(default=False, description="Persist durable jobs in the background_jobs table")
+    lease_seconds: float = Field(
+        default=60,
+        gt=0,
+        description="How long a durable job stays reserved for the process that claimed it without a renewal"
+    )
 
 
 class Settings(DatabaseConnectionSettings):
     debug: bool
-    auth: AuthSettings
\ No newline at end of file
+    auth: AuthSettings
+    cache: CacheSettings = CacheSettings()
+    server: ServerSettings = ServerSettings()
+    compression: CompressionSettings = CompressionSettings()
+    changes: ChangeFeedSettings = ChangeFeedSettings()
+    jobs: JobSettings = JobSettings()
+
+    @model_validator(mode="after")
+    def check_cache_is_shared(self) -> "Settings":
+        # Each worker would keep its own memory cache and never see the others' invalidations.
+        if self.cache.backend == "memory" and (self.server.workers or 1) > 1:
+            raise ValueError("cache.backend=memory only works with one server worker; use redis or none")
+        return self
+
+
+SettingsT = TypeVar("SettingsT", bound=DefaultSettings)
+
+
+@lru_cache
+def get_settings(settings_class: type[SettingsT] = Settings) -> SettingsT:
+    """Parse the environment and `.env` once per settings class and reuse the result."""
+    return settings_class()
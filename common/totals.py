@@ -0,0 +1,82 @@
+import json
+from enum import Enum
+from typing import Hashable, Optional
+
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.cache import TTLCache
+
+COUNT_CACHE_TTL = 10.0
+
+count_cache = TTLCache(maxsize=4096, ttl=COUNT_CACHE_TTL)
+
+
+class CountMode(str, Enum):
+    none = "none"
+    exact = "exact"
+    estimated = "estimated"
+
+
+async def _exact_count(session: AsyncSession, select_query: Select) -> int:
+    result = await session.execute(select(func.count()).select_from(select_query.order_by(None).subquery()))
+    return result.scalar_one()
+
+
+async def _table_estimate(session: AsyncSession, table_name: str) -> Optional[int]:
+    result = await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name}
+    )
+    estimate = result.scalar_one_or_none()
+    # reltuples is -1 (or 0 on old servers) until the table has been analyzed
+    return estimate if estimate and estimate > 0 else None
+
+
+async def _plan_estimate(session: AsyncSession, select_query: Select) -> Optional[int]:
+    compiled = select_query.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    # Sent as driver SQL: `text()` would read `:word` inside the rendered string literals as bind parameters.
+    connection = await session.connection()
+    result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_rows(
+        session: AsyncSession,
+        select_query: Select,
+        table_name: str,
+        mode: CountMode,
+        cache_key: Hashable,
+        filtered: bool = False
+) -> tuple[Optional[int], Optional[bool]]:
+    """Return `(total, is_estimate)` for a filtered select, or `(None, None)` when not asked.
+
+    Estimates come from `pg_class.reltuples` for unfiltered listings and from
+    the planner's row estimate otherwise; other dialects always count exactly.
+    Results are cached per filter for `COUNT_CACHE_TTL` seconds.
+    """
+    if mode == CountMode.none:
+        return None, None
+
+    key = (table_name, mode, cache_key)
+    cached = count_cache.get(key)
+    if cached is not None:
+        return cached
+
+    total, is_estimate = None, False
+    if mode == CountMode.estimated and session.get_bind().dialect.name == "postgresql":
+        is_estimate = True
+        if filtered:
+            total = await _plan_estimate(session, select_query)
+        else:
+            total = await _table_estimate(session, table_name)
+    if total is None:
+        total, is_estimate = await _exact_count(session, select_query), False
+
+    count_cache.set(key, (total, is_estimate))
+    return total, is_estimate
@@ -1,10 +1,22 @@
+import asyncio
+import itertools
+import logging
+import time
 from types import TracebackType
 from typing import Optional, Dict, Self, AsyncIterator
 
+from fastapi import Request, Response
+from sqlalchemy import text
 from sqlalchemy.engine import URL
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, AsyncSession, create_async_engine
 
-from common.settings import Settings
+from common.settings import Settings, get_settings
+from db.instrumentation import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_PIN_COOKIE = "db_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 class Database:
@@ -14,24 +26,47 @@ class Database:
                 settings: Optional[Settings] = None
                 ):
         engine_args = engine_args or {}
+        db_url_given = db_url is not None
 
-        self._settings = settings or Settings()
+        self._settings = settings
 
         if custom_engine:
             self._engine = custom_engine
         else:
+            if not db_url or not engine_args:
+                self._settings = self._settings or get_settings()
             if not db_url:
                 db_url = self._settings.database.get_url()
             if not engine_args:
-                engine_args = dict(
-                    echo=self._settings.database.debug
-                )
+                engine_args = self._settings.database.get_engine_args()
             self._engine = create_async_engine(db_url, **engine_args)  # type: ignore
 
         self._session_maker = async_sessionmaker(
             self._engine, class_=AsyncSession, expire_on_commit=False
         )
 
+        self._replica_engines: list[AsyncEngine] = []
+        if not custom_engine and not db_url_given:
+            self._replica_engines = [
+                create_async_engine(url, **engine_args)  # type: ignore
+                for url in self._settings.database.get_replica_urls()
+            ]
+        self._replica_session_makers = [
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            for engine in self._replica_engines
+        ]
+        self._healthy_replicas = set(range(len(self._replica_engines)))
+
+        instrumentation_args = {}
+        if self._settings is not None:
+            instrumentation_args = dict(
+                slow_query_threshold=self._settings.database.slow_query_threshold,
+                explain_slow_queries=self._settings.database.explain_slow_queries
+            )
+        for engine in [self._engine, *self._replica_engines]:
+            instrument_engine(engine, **instrumentation_args)
+        self._replica_counter = itertools.count()
+
     @property
     def engine(self) -> AsyncEngine:
         """Return an `AsyncEngine` object."""
@@ -42,22 +77,59 @@ class Database:
         """Return an `async_sessionmaker` object."""
         return self._session_maker
 
+    @property
+    def settings(self) -> Optional[Settings]:
+        """Return the `Settings` the database was built from, if any were needed."""
+        return self._settings
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self._replica_engines)
+
+    @property
+    def reader_session_maker(self) -> async_sessionmaker:
+        """Return the session maker of the next healthy replica, or the primary if none is healthy."""
+        healthy = sorted(self._healthy_replicas)
+        if not healthy:
+            return self._session_maker
+        return self._replica_session_makers[healthy[next(self._replica_counter) % len(healthy)]]
+
+    async def check_replicas(self, timeout: float = 2.0) -> None:
+        """Ping every replica and update the set used for reads."""
+        for index, engine in enumerate(self._replica_engines):
+            try:
+                async with asyncio.timeout(timeout):
+                    async with engine.connect() as connection:
+                        await connection.execute(text("SELECT 1"))
+            except Exception as e:
+                if index in self._healthy_replicas:
+                    logger.warning(f"Replica {engine.url.host} marked unhealthy: {e!r}")
+                self._healthy_replicas.discard(index)
+            else:
+                if index not in self._healthy_replicas:
+                    logger.info(f"Replica {engine.url.host} is healthy again")
+                self._healthy_replicas.add(index)
+
+    async def monitor_replicas(self) -> None:
+        """Run `check_replicas` forever at the configured interval."""
+        while True:
+            await self.check_replicas()
+            await asyncio.sleep(self._settings.database.replica_health_interval)
+
     async def dispose(self, close: bool = True) -> None:
-        """Dispose of the connection pool."""
+        """Dispose of the connection pools."""
         await self.engine.dispose(close=close)
+        for engine in self._replica_engines:
+            await engine.dispose(close=close)
 
 
 class DatabaseSession:
     """Database Session."""
 
-    def __init__(self, commit_on_exit: bool = False,
-                session_maker: Optional[async_sessionmaker] = None) -> None:
-        """Database session."""
+    def __init__(self, session_maker: async_sessionmaker, commit_on_exit: bool = False) -> None:
+        """Database session on a pool owned by the application's `Database`."""
         self.commit_on_exit = commit_on_exit
-        if session_maker is None:
-            self._session_maker = Database().session_maker
-        else:
-            self._session_maker = session_maker
+        self._session_maker = session_maker
         self._session = None
 
     @property
@@ -82,6 +154,34 @@ class DatabaseSession:
             await self.session.close()
 
 
-async def get_async_session() -> AsyncIterator[AsyncSession]:
-    async with DatabaseSession() as db:
+def get_database(request: Request) -> Database:
+    """Return the application-scoped `Database` created in the lifespan."""
+    return request.app.state.database
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """Whether the client wrote recently and its reads must go to the primary."""
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_read_session_maker(request: Request) -> async_sessionmaker:
+    """Return a replica session maker unless the client wrote recently and must read its own writes."""
+    database = get_database(request)
+    return database.session_maker if is_pinned_to_primary(request) else database.reader_session_maker
+
+
+async def get_async_session(request: Request, response: Response) -> AsyncIterator[AsyncSession]:
+    database = get_database(request)
+    if database.has_replicas and request.method not in SAFE_METHODS:
+        window = database.settings.database.read_your_writes_window
+        response.set_cookie(PRIMARY_PIN_COOKIE, str(time.time() + window), max_age=int(window) + 1, httponly=True)
+    async with DatabaseSession(session_maker=database.session_maker) as db:
+        yield db.session
+
+
+async def get_async_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    async with DatabaseSession(session_maker=get_read_session_maker(request)) as db:
         yield db.session
\ No newline at end of file
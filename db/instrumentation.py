@@ -0,0 +1,107 @@
+import contextvars
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from common.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+db_queries_total = registry.counter("db_queries_total", "SQL statements executed", ["dialect"])
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ["dialect"]
+)
+db_slow_queries_total = registry.counter(
+    "db_slow_queries_total", "SQL statements slower than the slow-query threshold", ["dialect"]
+)
+
+
+@dataclass
+class QueryStats:
+    """SQL statements executed while serving a single request."""
+    count: int = 0
+    total_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: Optional[str] = None
+    parent: Optional["QueryStats"] = None
+
+    def record(self, statement: str, elapsed: float) -> None:
+        if self.parent is not None:
+            self.parent.record(statement, elapsed)
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+
+_query_stats: contextvars.ContextVar[Optional[QueryStats]] = contextvars.ContextVar("_query_stats", default=None)
+
+
+def start_query_stats() -> tuple[QueryStats, contextvars.Token]:
+    """Begin collecting statements for the current context; enclosing collectors keep counting."""
+    stats = QueryStats(parent=_query_stats.get())
+    return stats, _query_stats.set(stats)
+
+
+def stop_query_stats(token: contextvars.Token) -> None:
+    _query_stats.reset(token)
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def instrument_engine(
+        engine: AsyncEngine,
+        slow_query_threshold: Optional[float] = None,
+        explain_slow_queries: bool = False
+) -> None:
+    """Time every statement run on `engine` and log the ones slower than the threshold.
+
+    With `explain_slow_queries`, slow SELECTs are re-run under EXPLAIN (never
+    ANALYZE) on the same connection and the plan is logged with them.
+    """
+    sync_engine = engine.sync_engine
+    dialect = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start_time"].pop()
+        db_queries_total.inc(dialect=dialect)
+        db_query_duration.observe(elapsed, dialect=dialect)
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+
+        if slow_query_threshold is None or elapsed < slow_query_threshold:
+            return
+        db_slow_queries_total.inc(dialect=dialect)
+        plan = None
+        if (
+            explain_slow_queries
+            and not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and not context.execution_options.get("stream_results")
+        ):
+            try:
+                plan = _explain(conn, statement, parameters)
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e!r}"
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms): {statement}" + (f"\n{plan}" if plan else "")
+        )
@@ -3,6 +3,7 @@ from typing import Annotated
 from fastapi import Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from db.database import get_async_session
+from db.database import get_async_session, get_async_read_session
 
-AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
\ No newline at end of file
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+AsyncReadSessionDep = Annotated[AsyncSession, Depends(get_async_read_session)]
\ No newline at end of file
@@ -1,23 +1,64 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-from common.settings import Settings
+from common.cache import response_cache, create_cache_backend
+from common.jobs import job_queue, SQLJobStore
+from common.compression import CompressionMiddleware
+from common.metrics import registry
+from common.middleware import RequestInstrumentationMiddleware
+from common.settings import get_settings
 from db.database import Database
 from services.books.routes.book import books_router
+from services.changes.routes import changes_router
 from services.shelves.routes.shelf import shelf_router
+from services.user.modules.manager import user_cache, configure_user_cache, password_hasher
 from services.user.routes.user import users_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    database = Database(settings=Settings())
+    settings = get_settings()
+    app.state.database = Database(settings=settings)
+    response_cache.configure(create_cache_backend(settings.cache))
+    configure_user_cache(settings.auth)
+    password_hasher.configure(settings.auth, settings.server.workers)
+    job_store = SQLJobStore(app.state.database.session_maker, settings.jobs.lease_seconds) if settings.jobs.durable else None
+    await job_queue.start(settings.jobs, job_store)
+    replica_monitor = None
+    if app.state.database.has_replicas:
+        replica_monitor = asyncio.create_task(app.state.database.monitor_replicas())
     yield
-    await database.dispose(close=False)
+    if replica_monitor is not None:
+        replica_monitor.cancel()
+        with suppress(asyncio.CancelledError):
+            await replica_monitor
+    await job_queue.stop(settings.server.graceful_timeout)
+    await response_cache.close()
+    password_hasher.shutdown()
+    await app.state.database.dispose()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(RequestInstrumentationMiddleware)
+app.add_middleware(CompressionMiddleware)
+
+cache_stats = registry.gauge("cache_stats", "Hit, miss and size counters of in-process caches", ["cache", "stat"])
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    caches = {"users": user_cache.stats()}
+    if response_cache.backend is not None:
+        caches["responses"] = response_cache.backend.stats()
+    for cache, stats in caches.items():
+        for stat, value in stats.items():
+            cache_stats.set(value, cache=cache, stat=stat)
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 
 app.include_router(books_router, tags=['books'])
 app.include_router(shelf_router, tags=['shelves'])
+app.include_router(changes_router, tags=['changes'])
 app.include_router(users_router)
\ No newline at end of file
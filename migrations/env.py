@@ -10,7 +10,7 @@ from alembic import context
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import SQLModel
 
-from common.settings import DatabaseConnectionSettings
+from common.settings import DatabaseConnectionSettings, get_settings
 from models import Book
 from models import Shelf
 from models import User
@@ -56,7 +56,7 @@ def run_migrations_offline() -> None:
 
     """
     context.configure(
-        url=DatabaseMigrationSettings().url.render_as_string(hide_password=False),
+        url=get_settings(DatabaseMigrationSettings).url.render_as_string(hide_password=False),
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
@@ -83,7 +83,7 @@ async def run_async_migrations() -> None:
     and associate a connection with the context.
 
     """
-    conn_config = DatabaseMigrationSettings()
+    conn_config = get_settings(DatabaseMigrationSettings)
     engine = create_async_engine(
         url=conn_config.url,
         poolclass=pool.NullPool,
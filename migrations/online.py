@@ -0,0 +1,98 @@
+"""Helpers for data migrations that must not lock production-sized tables.
+
+Every helper runs in an autocommit block, so each backfill batch and each
+`CONCURRENTLY`/`VALIDATE` step commits on its own instead of holding one
+long transaction for the whole migration.
+"""
+import logging
+import time
+from typing import Optional, Sequence
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.online")
+
+
+def backfill_in_batches(
+    table: str,
+    set_clause: str,
+    where: Optional[str] = None,
+    key: str = "id",
+    batch_size: int = 5000,
+    pause: float = 0.05,
+) -> int:
+    """Run `UPDATE table SET set_clause` in keyset-ordered batches of `batch_size` rows.
+
+    `set_clause` and `where` are raw SQL fragments evaluated against `table`.
+    Each batch commits separately and is followed by `pause` seconds of sleep
+    to leave room for replication and regular traffic. Returns the number of
+    updated rows.
+    """
+    condition = f" AND ({where})" if where else ""
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+        if low is None:
+            return 0
+        next_upper = sa.text(
+            f"SELECT max({key}) FROM (SELECT {key} FROM {table} "
+            f"WHERE {key} > :last ORDER BY {key} LIMIT :batch_size) AS batch"
+        )
+        update = sa.text(
+            f"UPDATE {table} SET {set_clause} WHERE {key} > :last AND {key} <= :upper{condition}"
+        )
+        started = time.monotonic()
+        last, updated = low - 1, 0
+        while True:
+            upper = bind.execute(next_upper, {"last": last, "batch_size": batch_size}).scalar()
+            if upper is None:
+                break
+            updated += bind.execute(update, {"last": last, "upper": upper}).rowcount
+            last = upper
+            done = (last - low + 1) / (high - low + 1)
+            elapsed = time.monotonic() - started
+            eta = elapsed / done - elapsed if done else 0.0
+            logger.info(f"{table}: {key} <= {last} ({done:.1%}), {updated} rows updated, ETA {eta:.0f}s")
+            if pause:
+                time.sleep(pause)
+    return updated
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence[str], **kw) -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(name, table, list(columns), postgresql_concurrently=True, if_not_exists=True, **kw)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def set_not_null(table: str, column: str) -> None:
+    """Add NOT NULL without holding an exclusive lock during the table scan.
+
+    The check constraint is added `NOT VALID` and validated under a
+    SHARE UPDATE EXCLUSIVE lock; Postgres then uses it to skip the scan in
+    `SET NOT NULL`.
+    """
+    constraint = f"ck_{table}_{column}_not_null"
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} CHECK ({column} IS NOT NULL) NOT VALID")
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {constraint}")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+
+
+def create_foreign_key(
+    name: str, table: str, referent: str, local_cols: Sequence[str], remote_cols: Sequence[str],
+    ondelete: Optional[str] = None,
+) -> None:
+    """Add a foreign key `NOT VALID` and validate existing rows in a separate step."""
+    on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+    with op.get_context().autocommit_block():
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({', '.join(local_cols)}) "
+            f"REFERENCES {referent} ({', '.join(remote_cols)}){on_delete} NOT VALID"
+        )
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
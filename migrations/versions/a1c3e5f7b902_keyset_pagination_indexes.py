@@ -0,0 +1,32 @@
+"""Keyset pagination indexes
+
+Revision ID: a1c3e5f7b902
+Revises: 8af82f5de182
+Create Date: 2026-10-18 10:02:11.204817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7b902'
+down_revision: Union[str, Sequence[str], None] = '8af82f5de182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently('ix_books_created_at_id', 'books', ['created_at', 'id'])
+    create_index_concurrently('ix_shelves_created_at_id', 'shelves', ['created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_shelves_created_at_id', 'shelves')
+    drop_index_concurrently('ix_books_created_at_id', 'books')
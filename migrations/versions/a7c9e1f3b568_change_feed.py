@@ -0,0 +1,50 @@
+"""Change feed
+
+Revision ID: a7c9e1f3b568
+Revises: f6b8d0e2a457
+Create Date: 2026-10-18 15:48:36.204817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import backfill_in_batches, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c9e1f3b568'
+down_revision: Union[str, Sequence[str], None] = 'f6b8d0e2a457'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.VARCHAR(length=16), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_deleted_at_id', 'tombstones', ['deleted_at', 'id'])
+
+    # now() is evaluated once and kept in the catalog, so existing rows are not rewritten;
+    # the backfill then dates them from created_at.
+    for table in ('books', 'shelves'):
+        op.add_column(table, sa.Column(
+            'updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False
+        ))
+        backfill_in_batches(table, "updated_at = created_at", where="created_at IS NOT NULL")
+        create_index_concurrently(f'ix_{table}_updated_at_id', table, ['updated_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('shelves', 'books'):
+        drop_index_concurrently(f'ix_{table}_updated_at_id', table)
+        op.drop_column(table, 'updated_at')
+    op.drop_index('ix_tombstones_deleted_at_id', table_name='tombstones')
+    op.drop_table('tombstones')
@@ -0,0 +1,50 @@
+"""Name search indexes
+
+Revision ID: b2d4f6a8c013
+Revises: a1c3e5f7b902
+Create Date: 2026-10-18 10:41:37.518201
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8c013'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f7b902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    create_index_concurrently(
+        'ix_books_name_trgm', 'books', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+    create_index_concurrently(
+        'ix_shelves_name_trgm', 'shelves', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+
+    # An expression index instead of a stored generated column, which would rewrite
+    # the whole table under an ACCESS EXCLUSIVE lock. Queries must repeat the
+    # expression exactly (`models.books.BOOK_SEARCH_DOCUMENT`) for it to be used.
+    create_index_concurrently(
+        'ix_books_search_document', 'books',
+        [sa.text("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))")],
+        postgresql_using='gin'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_books_search_document', 'books')
+    drop_index_concurrently('ix_shelves_name_trgm', 'shelves')
+    drop_index_concurrently('ix_books_name_trgm', 'books')
@@ -0,0 +1,37 @@
+"""Created at not null
+
+Revision ID: b8d0f2a4c679
+Revises: a7c9e1f3b568
+Create Date: 2026-10-19 10:12:44.318206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import backfill_in_batches, set_not_null
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d0f2a4c679'
+down_revision: Union[str, Sequence[str], None] = 'a7c9e1f3b568'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows without created_at sort last on Postgres and can never be reached by the
+    # `(created_at, id) > cursor` keyset condition. They are dated from updated_at,
+    # which the change feed migration set to the time it ran.
+    for table in ('books', 'shelves'):
+        backfill_in_batches(table, "created_at = updated_at", where="created_at IS NULL")
+        op.alter_column(table, 'created_at', server_default=sa.text('now()'))
+        set_not_null(table, 'created_at')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ('shelves', 'books'):
+        op.alter_column(table, 'created_at', nullable=True, server_default=None)
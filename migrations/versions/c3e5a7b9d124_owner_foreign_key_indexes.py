@@ -0,0 +1,33 @@
+"""Owner foreign key indexes
+
+Revision ID: c3e5a7b9d124
+Revises: b2d4f6a8c013
+Create Date: 2026-10-18 11:26:05.947312
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e5a7b9d124'
+down_revision: Union[str, Sequence[str], None] = 'b2d4f6a8c013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ix_books_user_id is created by e5a7c9d1f346, which adds books.user_id.
+    create_index_concurrently('ix_books_shelf_id', 'books', ['shelf_id'])
+    create_index_concurrently('ix_shelves_user_id', 'shelves', ['user_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_shelves_user_id', 'shelves')
+    drop_index_concurrently('ix_books_shelf_id', 'books')
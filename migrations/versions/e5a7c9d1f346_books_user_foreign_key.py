@@ -0,0 +1,48 @@
+"""Books user foreign key
+
+Revision ID: e5a7c9d1f346
+Revises: d4f6b8c0e235
+Create Date: 2026-10-18 12:41:17.502983
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import (
+    backfill_in_batches, create_foreign_key, create_index_concurrently, drop_index_concurrently, set_not_null,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9d1f346'
+down_revision: Union[str, Sequence[str], None] = 'd4f6b8c0e235'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Nullable ADD COLUMN only touches the catalog; the owner is copied from the shelf afterwards.
+    op.execute("ALTER TABLE books ADD COLUMN IF NOT EXISTS user_id INTEGER")
+    backfill_in_batches(
+        'books',
+        "user_id = (SELECT shelves.user_id FROM shelves WHERE shelves.id = books.shelf_id)",
+        where="user_id IS NULL",
+    )
+    set_not_null('books', 'user_id')
+
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys('books')
+    if not any(fk['constrained_columns'] == ['user_id'] for fk in foreign_keys):
+        create_foreign_key('fk_books_user_id_users', 'books', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+
+    create_index_concurrently('ix_books_user_id', 'books', ['user_id'])
+    create_index_concurrently('ix_books_user_id_created_at_id', 'books', ['user_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_books_user_id_created_at_id', 'books')
+    drop_index_concurrently('ix_books_user_id', 'books')
+    op.execute("ALTER TABLE books DROP CONSTRAINT IF EXISTS fk_books_user_id_users")
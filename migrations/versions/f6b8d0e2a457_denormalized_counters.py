@@ -0,0 +1,53 @@
+"""Denormalized counters
+
+Revision ID: f6b8d0e2a457
+Revises: e5a7c9d1f346
+Create Date: 2026-10-18 14:22:09.761254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.online import backfill_in_batches, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b8d0e2a457'
+down_revision: Union[str, Sequence[str], None] = 'e5a7c9d1f346'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Constant defaults are stored in the catalog, so these do not rewrite the tables.
+    op.add_column('shelves', sa.Column('book_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('shelves', sa.Column('last_book_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('shelf_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('book_count', sa.Integer(), server_default='0', nullable=False))
+
+    create_index_concurrently('ix_books_shelf_id_created_at', 'books', ['shelf_id', 'created_at'])
+
+    backfill_in_batches(
+        'shelves',
+        "book_count = (SELECT count(*) FROM books WHERE books.shelf_id = shelves.id), "
+        "last_book_at = (SELECT max(books.created_at) FROM books WHERE books.shelf_id = shelves.id)",
+        batch_size=1000,
+    )
+    backfill_in_batches(
+        'users',
+        "shelf_count = (SELECT count(*) FROM shelves WHERE shelves.user_id = users.id), "
+        "book_count = (SELECT count(*) FROM books WHERE books.user_id = users.id)",
+        batch_size=1000,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently('ix_books_shelf_id_created_at', 'books')
+    op.drop_column('users', 'book_count')
+    op.drop_column('users', 'shelf_count')
+    op.drop_column('shelves', 'last_book_at')
+    op.drop_column('shelves', 'book_count')
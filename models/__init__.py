@@ -1,4 +1,5 @@
 from .books import Book
 from .shelves import Shelf
 from .user import User
-
+from .jobs import BackgroundJob
+from .tombstones import Tombstone
@@ -1,19 +1,38 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, DateTime, VARCHAR
+from sqlalchemy import Column, DateTime, VARCHAR, Index, text
 from sqlmodel import Field, SQLModel, Relationship
 
+# Full-text document of a book. Searches must use this exact expression to hit
+# the `ix_books_search_document` GIN index.
+BOOK_SEARCH_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))"
+
 
 class Book(SQLModel, table=True):
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_id", "created_at", "id"),
+        Index("ix_books_updated_at_id", "updated_at", "id"),
+        Index("ix_books_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_books_shelf_id_created_at", "shelf_id", "created_at"),
+        Index(
+            "ix_books_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+        Index(
+            "ix_books_search_document", text(BOOK_SEARCH_DOCUMENT), postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id: Optional[int] = Field(primary_key=True)
     name: str = Field(sa_column=Column(VARCHAR(100), nullable=False))
     description: Optional[str] = Field(sa_column=Column(VARCHAR(500), nullable=True))
     link: Optional[str] = Field(sa_column=Column(VARCHAR(500), nullable=True))
     created_at: datetime = Field(
-        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow))
-    shelf_id: int = Field(foreign_key="shelves.id", nullable=False)
+        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False))
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False))
+    shelf_id: int = Field(foreign_key="shelves.id", nullable=False, index=True)
     shelf: "Shelf" = Relationship(back_populates="books")
-    user_id: int = Field(foreign_key="users.id", nullable=False)
+    user_id: int = Field(foreign_key="users.id", ondelete="CASCADE", nullable=False, index=True)
     user: "User" = Relationship(back_populates="published_books")
\ No newline at end of file
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Any, Optional
+from sqlalchemy import Column, DateTime, VARCHAR, JSON, Text
+from sqlmodel import Field, SQLModel
+
+
+class BackgroundJob(SQLModel, table=True):
+    __tablename__ = "background_jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str = Field(sa_column=Column(VARCHAR(100), nullable=False))
+    payload: dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    status: str = Field(default="pending", sa_column=Column(VARCHAR(16), nullable=False, index=True))
+    attempts: int = Field(default=0)
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    lease_until: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), nullable=True))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow))
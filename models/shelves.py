@@ -1,5 +1,5 @@
 from typing import Optional, List
-from sqlalchemy import Column, VARCHAR, DateTime
+from sqlalchemy import Column, VARCHAR, DateTime, Index, Integer
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
 
@@ -8,13 +8,26 @@ from datetime import datetime
 
 class Shelf(SQLModel, table=True):
     __tablename__ = "shelves"
+    __table_args__ = (
+        Index("ix_shelves_created_at_id", "created_at", "id"),
+        Index("ix_shelves_updated_at_id", "updated_at", "id"),
+        Index(
+            "ix_shelves_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
 
     id: Optional[int] = Field(primary_key=True)
     name: str = Field(sa_column=Column(VARCHAR(100), nullable=False))
     description: Optional[str] = Field(sa_column=Column(VARCHAR(500), nullable=True))
     created_at: datetime = Field(
-        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow)
+        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    )
+    updated_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     )
+    book_count: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    last_book_at: Optional[datetime] = Field(default=None, sa_column=Column(DateTime(timezone=True), nullable=True))
     books: List["Book"] = Relationship(back_populates="shelf")
-    user_id: int = Field(foreign_key="users.id", nullable=False)
+    user_id: int = Field(foreign_key="users.id", nullable=False, index=True)
     user: "User" = Relationship(back_populates="created_shelves")
\ No newline at end of file
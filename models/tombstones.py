@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, DateTime, VARCHAR, Index
+from sqlmodel import Field, SQLModel
+
+
+class Tombstone(SQLModel, table=True):
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_deleted_at_id", "deleted_at", "id"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    entity: str = Field(sa_column=Column(VARCHAR(16), nullable=False))
+    entity_id: int = Field(nullable=False)
+    deleted_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False))
@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
-from sqlalchemy import VARCHAR, Column
+from sqlalchemy import VARCHAR, Column, Integer
 
 
 class User(SQLModel, table=True):
@@ -14,5 +14,7 @@ class User(SQLModel, table=True):
     is_active: bool = Field(default=True)
     is_super_user: bool = Field(default=False)
     is_verified: bool = Field(default=False)
+    shelf_count: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
+    book_count: int = Field(default=0, sa_column=Column(Integer, nullable=False, server_default="0"))
     published_books: List["Book"] = Relationship(back_populates="user")
     created_shelves: List["Shelf"] = Relationship(back_populates="user")
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""Production entry point.
+
+    python -m serve serve [--workers N] [--host HOST] [--port PORT]
+    python -m serve reconcile-counters [--batch-size N]
+
+Runs N worker processes (one per core by default). With gunicorn installed
+the application is imported once in the master and forked, sharing memory
+between workers; otherwise uvicorn's own process manager is used. uvloop and
+httptools are picked up when available. Each worker's pool is sized so that
+all workers together stay within `server.db_connection_budget` connections
+per database host. SIGTERM drains in-flight requests for up to
+`server.graceful_timeout` seconds, then the lifespan disposes the pools.
+With more than one worker, `cache.backend` must be `redis` or `none`: a
+memory cache would not see other workers' invalidations.
+
+`reconcile-counters` recomputes the denormalized shelf and user counters
+from `books` and `shelves` and repairs any that drifted.
+"""
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+
+from common.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def size_worker_pools(workers: int, budget: int) -> tuple[int, int]:
+    """Split the connection budget evenly and return `(pool_size, max_overflow)` per worker.
+
+    Every worker needs at least one connection, so `workers` must not exceed `budget`.
+    """
+    if workers > budget:
+        raise ValueError(f"{workers} workers need at least {workers} connections, the budget is {budget}")
+    per_worker = budget // workers
+    pool_size = max(1, per_worker * 2 // 3)
+    return pool_size, per_worker - pool_size
+
+
+def _module_available(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def serve(args: argparse.Namespace) -> None:
+    server = get_settings().server
+    workers = args.workers or server.workers or os.cpu_count() or 1
+    host = args.host or server.host
+    port = args.port or server.port
+    if workers > server.db_connection_budget:
+        logger.warning(
+            f"Capping {workers} workers to server.db_connection_budget={server.db_connection_budget}, "
+            f"one connection each"
+        )
+        workers = server.db_connection_budget
+
+    pool_size, max_overflow = size_worker_pools(workers, server.db_connection_budget)
+    os.environ["BE_DATABASE__POOL_SIZE"] = str(pool_size)
+    os.environ["BE_DATABASE__MAX_OVERFLOW"] = str(max_overflow)
+    # Workers size their password hashing pools from their share of the cores.
+    os.environ["BE_SERVER__WORKERS"] = str(workers)
+    get_settings.cache_clear()
+    # Validate the settings the workers will load before forking them.
+    get_settings()
+    logger.info(f"Starting {workers} workers on {host}:{port}, pool {pool_size}+{max_overflow} per worker")
+
+    if _module_available("gunicorn"):
+        _run_gunicorn(host, port, workers, server.graceful_timeout, server.keepalive)
+    else:
+        _run_uvicorn(host, port, workers, server.graceful_timeout, server.keepalive)
+
+
+def _run_gunicorn(host: str, port: int, workers: int, graceful_timeout: float, keepalive: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    worker_class = (
+        "uvicorn_worker.UvicornWorker" if _module_available("uvicorn_worker") else "uvicorn.workers.UvicornWorker"
+    )
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", worker_class)
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", graceful_timeout)
+            self.cfg.set("keepalive", keepalive)
+
+        def load(self):
+            from main import app
+            return app
+
+    PreloadedApplication().run()
+
+
+def _run_uvicorn(host: str, port: int, workers: int, graceful_timeout: float, keepalive: int) -> None:
+    import uvicorn
+
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop" if _module_available("uvloop") else "asyncio",
+        http="httptools" if _module_available("httptools") else "h11",
+        timeout_graceful_shutdown=int(graceful_timeout),
+        timeout_keep_alive=keepalive,
+    )
+
+
+def reconcile(args: argparse.Namespace) -> None:
+    from db.database import Database
+    from services.books.modules.counters import reconcile_counters
+
+    async def run() -> dict[str, int]:
+        database = Database()
+        try:
+            return await reconcile_counters(database.session_maker, args.batch_size)
+        finally:
+            await database.dispose()
+
+    repaired = asyncio.run(run())
+    logger.info(f"Repaired counters on {repaired['shelves']} shelves and {repaired['users']} users")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the API with multiple worker processes")
+    serve_parser.add_argument("--workers", type=int, default=None)
+    serve_parser.add_argument("--host", default=None)
+    serve_parser.add_argument("--port", type=int, default=None)
+    serve_parser.set_defaults(handler=serve)
+    reconcile_parser = commands.add_parser("reconcile-counters", help="Repair drifted book and shelf counters")
+    reconcile_parser.add_argument("--batch-size", type=int, default=1000)
+    reconcile_parser.set_defaults(handler=reconcile)
+    return parser
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    arguments = build_parser().parse_args()
+    arguments.handler(arguments)
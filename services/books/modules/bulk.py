@@ -0,0 +1,145 @@
+import json
+from typing import Any, AsyncIterator, Iterable
+
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+
+from dependecies.session import AsyncSessionDep
+from services.books.query_builder import BookQueryBuilder
+from services.books.schemas import BookCreateSchema, BookBulkResultSchema, BookBulkErrorSchema
+from services.shelves.query_builder import ShelfQueryBuilder
+
+BULK_CHUNK_SIZE = 1000
+
+
+class InvalidBulkPayload(Exception):
+    """Exception raised when a bulk payload is neither a JSON array nor NDJSON."""
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+
+async def iter_json_array(body: bytes) -> AsyncIterator[Any]:
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise InvalidBulkPayload("Body is not valid JSON") from e
+    if not isinstance(items, list):
+        raise InvalidBulkPayload("Expected a JSON array of books")
+    for item in items:
+        yield item
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Yield one decoded object per non-empty line; undecodable lines yield the raw bytes."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _decode_line(line)
+    if buffer.strip():
+        yield _decode_line(buffer)
+
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line
+
+
+async def _chunked(items: AsyncIterator[Any], size: int) -> AsyncIterator[list[tuple[int, Any]]]:
+    chunk = []
+    index = 0
+    async for item in items:
+        chunk.append((index, item))
+        index += 1
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def import_books(
+        session: AsyncSessionDep,
+        user_id: int,
+        items: AsyncIterator[Any],
+        chunk_size: int = BULK_CHUNK_SIZE
+) -> BookBulkResultSchema:
+    """Validate and insert books chunk by chunk, collecting per-item errors.
+
+    Shelf ownership is checked once per distinct `shelf_id` across the whole
+    import; every chunk is inserted with one multi-row INSERT and committed,
+    so a bad item never rolls back its neighbours. A chunk the database
+    rejects is retried row by row to report the offending items.
+    """
+    report = BookBulkResultSchema()
+    shelf_ownership: dict[int, bool] = {}
+
+    async for chunk in _chunked(items, chunk_size):
+        valid: list[tuple[int, BookCreateSchema]] = []
+        for index, raw in chunk:
+            if isinstance(raw, bytes):
+                report.errors.append(BookBulkErrorSchema(index=index, error="Invalid JSON"))
+                continue
+            if not isinstance(raw, dict):
+                report.errors.append(BookBulkErrorSchema(index=index, error="Item is not a JSON object"))
+                continue
+            try:
+                valid.append((index, BookCreateSchema.model_validate(raw)))
+            except ValidationError as e:
+                report.errors.append(BookBulkErrorSchema(index=index, error=_format_validation_error(e)))
+
+        await _check_shelves(session, user_id, (book.shelf_id for _, book in valid), shelf_ownership)
+
+        rows = []
+        for index, book in valid:
+            if not shelf_ownership[book.shelf_id]:
+                report.errors.append(BookBulkErrorSchema(index=index, error=f"Shelf {book.shelf_id} not found"))
+                continue
+            rows.append((index, {**book.model_dump(), "user_id": user_id}))
+
+        await _insert_chunk(session, rows, report)
+
+    report.errors.sort(key=lambda error: error.index)
+    return report
+
+
+async def _insert_chunk(
+        session: AsyncSessionDep,
+        rows: list[tuple[int, dict]],
+        report: BookBulkResultSchema
+) -> None:
+    try:
+        ids = await BookQueryBuilder.add_books(session, [row for _, row in rows])
+    except DBAPIError:
+        await session.rollback()
+        if len(rows) == 1:
+            report.errors.append(BookBulkErrorSchema(index=rows[0][0], error="Rejected by the database"))
+            return
+        for row in rows:
+            await _insert_chunk(session, [row], report)
+        return
+    report.ids.extend(ids)
+    report.created += len(ids)
+
+
+async def _check_shelves(
+        session: AsyncSessionDep,
+        user_id: int,
+        shelf_ids: Iterable[int],
+        shelf_ownership: dict[int, bool]
+) -> None:
+    unchecked = set(shelf_ids) - shelf_ownership.keys()
+    if not unchecked:
+        return
+    owned = await ShelfQueryBuilder.get_user_shelf_ids(session, user_id, unchecked)
+    for shelf_id in unchecked:
+        shelf_ownership[shelf_id] = shelf_id in owned
@@ -0,0 +1,156 @@
+"""Denormalized book and shelf counters on `shelves` and `users`.
+
+Writers call these helpers inside their own transaction, so a counter and
+the rows it counts always commit together. `reconcile_counters` recomputes
+everything from `books`/`shelves` in keyset batches and repairs any drift.
+Counter writes leave `shelves.updated_at` alone, so they do not show up in
+the change feed.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy import ColumnElement, DateTime, Integer, bindparam, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from models import Book, Shelf, User
+
+shelves = Shelf.__table__
+users = User.__table__
+books = Book.__table__
+
+
+def _later(column: ColumnElement, value: ColumnElement) -> ColumnElement:
+    return case((or_(column.is_(None), column < value), value), else_=column)
+
+
+def _latest_book_at(shelf_id: ColumnElement) -> ColumnElement:
+    return select(func.max(books.c.created_at)).where(books.c.shelf_id == shelf_id).scalar_subquery()
+
+
+def _shelf_book_count(shelf_id: ColumnElement) -> ColumnElement:
+    return select(func.count()).where(books.c.shelf_id == shelf_id).scalar_subquery()
+
+
+async def _adjust_users(session: AsyncSession, column: str, deltas: dict[int, int]) -> None:
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    query = (
+        update(users)
+        .where(users.c.id == bindparam("b_user_id"))
+        .values({column: users.c[column] + bindparam("b_delta", type_=Integer)})
+    )
+    await session.execute(query, [{"b_user_id": user_id, "b_delta": delta} for user_id, delta in deltas.items()])
+
+
+async def add_books(session: AsyncSession, added: Iterable[tuple[int, int, Optional[datetime]]]) -> None:
+    """Count new books, given as `(shelf_id, user_id, created_at)`, on their shelves and owners."""
+    per_shelf: dict[int, list] = {}
+    per_user: Counter = Counter()
+    for shelf_id, user_id, created_at in added:
+        count, latest = per_shelf.get(shelf_id, (0, None))
+        if created_at is not None and (latest is None or created_at > latest):
+            latest = created_at
+        per_shelf[shelf_id] = [count + 1, latest]
+        per_user[user_id] += 1
+    if not per_shelf:
+        return
+    query = (
+        update(shelves)
+        .where(shelves.c.id == bindparam("b_shelf_id"))
+        .values(
+            book_count=shelves.c.book_count + bindparam("b_added", type_=Integer),
+            last_book_at=_later(shelves.c.last_book_at, bindparam("b_latest", type_=DateTime(timezone=True))),
+            updated_at=shelves.c.updated_at
+        )
+    )
+    await session.execute(query, [
+        {"b_shelf_id": shelf_id, "b_added": count, "b_latest": latest}
+        for shelf_id, (count, latest) in per_shelf.items()
+    ])
+    await _adjust_users(session, "book_count", per_user)
+
+
+async def remove_books(session: AsyncSession, removed: Iterable[tuple[int, int]], count_users: bool = True) -> None:
+    """Uncount deleted (or moved away) books, given as `(shelf_id, user_id)`.
+
+    Must run after the rows are gone: `last_book_at` is recomputed from the
+    remaining books through `ix_books_shelf_id_created_at`.
+    """
+    per_shelf: Counter = Counter()
+    per_user: Counter = Counter()
+    for shelf_id, user_id in removed:
+        per_shelf[shelf_id] += 1
+        per_user[user_id] += 1
+    if not per_shelf:
+        return
+    query = (
+        update(shelves)
+        .where(shelves.c.id == bindparam("b_shelf_id"))
+        .values(
+            book_count=shelves.c.book_count - bindparam("b_removed", type_=Integer),
+            last_book_at=_latest_book_at(shelves.c.id),
+            updated_at=shelves.c.updated_at
+        )
+    )
+    await session.execute(query, [
+        {"b_shelf_id": shelf_id, "b_removed": count} for shelf_id, count in per_shelf.items()
+    ])
+    if count_users:
+        await _adjust_users(session, "book_count", {user_id: -count for user_id, count in per_user.items()})
+
+
+async def move_book(session: AsyncSession, from_shelf_id: int, book: Book) -> None:
+    """Move one book's count between shelves; its owner's total is unchanged."""
+    await remove_books(session, [(from_shelf_id, book.user_id)], count_users=False)
+    await session.execute(
+        update(shelves)
+        .where(shelves.c.id == book.shelf_id)
+        .values(
+            book_count=shelves.c.book_count + 1,
+            last_book_at=_later(shelves.c.last_book_at, book.created_at),
+            updated_at=shelves.c.updated_at
+        )
+    )
+
+
+async def adjust_shelf_count(session: AsyncSession, user_id: int, delta: int) -> None:
+    await _adjust_users(session, "shelf_count", {user_id: delta})
+
+
+async def reconcile_counters(session_maker: async_sessionmaker, batch_size: int = 1000) -> dict[str, int]:
+    """Recompute every counter in `batch_size` keyset batches, one transaction each.
+
+    Only rows whose stored values differ are written. Returns the number of
+    repaired shelves and users.
+    """
+    shelf_book_count = _shelf_book_count(shelves.c.id)
+    shelf_latest = _latest_book_at(shelves.c.id)
+    user_book_count = select(func.count()).where(books.c.user_id == users.c.id).scalar_subquery()
+    user_shelf_count = select(func.count()).where(shelves.c.user_id == users.c.id).scalar_subquery()
+    targets = {
+        "shelves": (shelves, {"book_count": shelf_book_count, "last_book_at": shelf_latest}),
+        "users": (users, {"book_count": user_book_count, "shelf_count": user_shelf_count}),
+    }
+    repaired = {}
+    for name, (table, values) in targets.items():
+        repaired[name] = 0
+        last_id = 0
+        while True:
+            async with session_maker() as session:
+                batch = await session.execute(
+                    select(table.c.id).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                )
+                ids = list(batch.scalars())
+                if not ids:
+                    break
+                drifted = or_(*(table.c[column].is_distinct_from(value) for column, value in values.items()))
+                repair = update(table).where(table.c.id.between(ids[0], ids[-1]), drifted).values(values)
+                if "updated_at" in table.c:
+                    repair = repair.values(updated_at=table.c.updated_at)
+                result = await session.execute(repair)
+                await session.commit()
+            repaired[name] += result.rowcount
+            last_id = ids[-1]
+    return repaired
@@ -1,42 +1,89 @@
 from typing import List
 from sqlmodel import select
 
+from common.batching import id_in
+from common.cache import schedule_invalidation
 from common.errors import EmptyQueryResult
+from services.books.errors import BookNotFound
+from services.shelves.errors import ShelfNotFound
+from services.books.modules import counters
 from dependecies.session import AsyncSessionDep
-from models.books import Book
+from models.books import BOOK_SEARCH_DOCUMENT, Book
+from models.shelves import Shelf
+from models.tombstones import Tombstone
 from services.books.schemas import BookUpdateSchema, BookResponseSchema
 from common.schemas import PaginationParams
+from common.pagination import apply_pagination
+from common.totals import CountMode, count_rows
 from services.books.schemas import BookFilter
-from services.books.schemas import BookFilter
-from sqlalchemy import Select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import Row, Select, case, delete, func, insert, literal_column, or_, update
+
+SEARCH_CONFIG = 'simple'
+BOOK_RESPONSE_COLUMNS = [getattr(Book, field) for field in BookResponseSchema.model_fields]
 
 
 class BookQueryBuilder:
     @staticmethod
-    async def get_books_pagination(session:AsyncSessionDep, pagination_params:PaginationParams, filters:BookFilter) -> Select:
-        query_offset, query_limit = pagination_params.page * pagination_params.size, pagination_params.size
-        select_query = BookQueryBuilder.apply_filters(select(Book), filters).offset(query_offset).limit(query_limit)
-        result = await session.execute(select_query)
+    async def get_books_pagination(session:AsyncSessionDep, pagination_params:PaginationParams, filters:BookFilter) -> list[Book]:
+        select_query = BookQueryBuilder.apply_filters(select(Book), filters)
+        result = await session.execute(apply_pagination(select_query, Book, pagination_params))
         books = result.scalars().all()
         if not books:
             raise EmptyQueryResult
         return books
     @staticmethod
-    def apply_filters(select_query: Select, filters: BookFilter) -> Select:
-        if filters and filters.name:
-            select_query = select_query.where(Book.name.ilike(f'%{filters.name}%'))
-        return select_query
+    async def get_books_pagination_rows(session: AsyncSessionDep, pagination_params: PaginationParams, filters: BookFilter) -> list[Row]:
+        """Fetch only the `BookResponseSchema` columns as plain rows, bypassing the identity map."""
+        select_query = BookQueryBuilder.apply_filters(select(*BOOK_RESPONSE_COLUMNS), filters)
+        result = await session.execute(apply_pagination(select_query, Book, pagination_params))
+        rows = result.all()
+        if not rows:
+            raise EmptyQueryResult
+        return rows
 
     @staticmethod
-    async def get_book_by_user_id(session: AsyncSessionDep, user_id: int) -> list[Book]:
-        query = select(Book).where(Book.user_id == user_id)
-        result = await session.execute(query)
+    async def count_books(session: AsyncSessionDep, filters: BookFilter, mode: CountMode) -> tuple[int | None, bool | None]:
+        select_query = BookQueryBuilder.apply_filters(select(Book.id), filters)
+        cache_key = filters.model_dump_json() if filters else None
+        return await count_rows(session, select_query, Book.__tablename__, mode, cache_key, filtered=bool(filters))
+
+    @staticmethod
+    async def search_books(session: AsyncSessionDep, pagination_params: PaginationParams, search: str) -> list[Book]:
+        query_offset, query_limit = pagination_params.page * pagination_params.size, pagination_params.size
+        if session.get_bind().dialect.name == 'postgresql':
+            ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+            search_vector = literal_column(BOOK_SEARCH_DOCUMENT)
+            select_query = (
+                select(Book)
+                .where(search_vector.op('@@')(ts_query))
+                .order_by(func.ts_rank_cd(search_vector, ts_query).desc(), Book.id)
+            )
+        else:
+            name_match = Book.name.ilike(f'%{search}%')
+            select_query = (
+                select(Book)
+                .where(or_(name_match, Book.description.ilike(f'%{search}%')))
+                .order_by(case((name_match, 0), else_=1), Book.id)
+            )
+        result = await session.execute(select_query.offset(query_offset).limit(query_limit))
         books = result.scalars().all()
         if not books:
             raise EmptyQueryResult
         return books
 
+    @staticmethod
+    def get_books_export_query(filters: BookFilter) -> Select:
+        select_query = select(
+            Book.id, Book.name, Book.description, Book.link, Book.created_at, Book.shelf_id, Book.user_id
+        )
+        return BookQueryBuilder.apply_filters(select_query, filters).order_by(Book.id)
+
+    @staticmethod
+    def apply_filters(select_query: Select, filters: BookFilter) -> Select:
+        if filters and filters.name:
+            select_query = select_query.where(Book.name.ilike(f'%{filters.name}%'))
+        return select_query
+
     @staticmethod
     async def get_book_by_id(session:AsyncSessionDep, book_id:int) -> Book:
         query = select(Book).where(Book.id == book_id)
@@ -46,12 +93,37 @@ class BookQueryBuilder:
             raise EmptyQueryResult
         return book
 
+    @staticmethod
+    async def get_books_by_ids(session: AsyncSessionDep, book_ids: list[int]) -> list[Book]:
+        """Fetch many books with one statement, in the order of `book_ids`; missing ids are skipped."""
+        result = await session.execute(select(Book).where(id_in(session, Book.id, book_ids)))
+        books = {book.id: book for book in result.scalars()}
+        found = [books[book_id] for book_id in book_ids if book_id in books]
+        if not found:
+            raise EmptyQueryResult
+        return found
+
     @staticmethod
     async def get_books_by_user(
             session: AsyncSessionDep,
-            user_id: int
+            user_id: int,
+            pagination_params: PaginationParams
     ) -> List[Book]:
-        select_query = select(Book).options(selectinload(Book.user))
+        select_query = apply_pagination(select(Book).where(Book.user_id == user_id), Book, pagination_params)
+        query_result = await session.execute(select_query)
+        books = list(query_result.scalars())
+
+        if not books:
+            raise EmptyQueryResult
+        return books
+
+    @staticmethod
+    async def get_books_by_shelf(
+            session: AsyncSessionDep,
+            shelf_id: int,
+            pagination_params: PaginationParams
+    ) -> List[Book]:
+        select_query = apply_pagination(select(Book).where(Book.shelf_id == shelf_id), Book, pagination_params)
         query_result = await session.execute(select_query)
         books = list(query_result.scalars())
 
@@ -62,15 +134,40 @@ class BookQueryBuilder:
     @staticmethod
     async def add_book(session:AsyncSessionDep, book:Book):
         session.add(book)
+        await session.flush()
+        await counters.add_books(session, [(book.shelf_id, book.user_id, book.created_at)])
         await session.commit()
         await session.refresh(book)
+        await schedule_invalidation("books", "shelf-stats")
         return book
 
     @staticmethod
-    async def delete_book(session:AsyncSessionDep, book_id:int):
-        book = await BookQueryBuilder.get_book_by_id(session, book_id)
-        await session.delete(book)
+    async def add_books(session: AsyncSessionDep, books: list[dict]) -> list[int]:
+        """Insert many books with batched multi-row INSERT ... RETURNING and commit once."""
+        if not books:
+            return []
+        insert_query = insert(Book).returning(
+            Book.id, Book.shelf_id, Book.user_id, Book.created_at, sort_by_parameter_order=True
+        )
+        result = await session.execute(insert_query, books)
+        rows = result.all()
+        await counters.add_books(session, [(row.shelf_id, row.user_id, row.created_at) for row in rows])
+        ids = [row.id for row in rows]
+        await session.commit()
+        await schedule_invalidation("books", "shelf-stats")
+        return ids
+
+    @staticmethod
+    async def delete_book(session:AsyncSessionDep, book_id:int, user_id:int):
+        query = delete(Book).where(Book.id == book_id, Book.user_id == user_id).returning(Book.shelf_id)
+        result = await session.execute(query)
+        shelf_id = result.scalar_one_or_none()
+        if shelf_id is None:
+            raise BookNotFound
+        await counters.remove_books(session, [(shelf_id, user_id)])
+        await session.execute(insert(Tombstone).values(entity="book", entity_id=book_id))
         await session.commit()
+        await schedule_invalidation("books", "shelf-stats")
 
     @staticmethod
     async def get_book_by_name(session: AsyncSessionDep, book_name: str) -> Book:
@@ -82,10 +179,31 @@ class BookQueryBuilder:
         return book
 
     @staticmethod
-    async def update_book(session:AsyncSessionDep, book_id:int, data:BookUpdateSchema):
-        book = await BookQueryBuilder.get_book_by_id(session, book_id)
-        for key, value in data.model_dump(exclude_unset=True).items():
-            setattr(book, key, value)
-        await session.commit()
-        await session.refresh(book)
+    async def update_book(session:AsyncSessionDep, book_id:int, data:BookUpdateSchema, user_id:int) -> Book:
+        values = data.model_dump(exclude_unset=True)
+        from_shelf_id = None
+        if values.get("shelf_id") is not None:
+            current = select(Book.shelf_id).where(Book.id == book_id, Book.user_id == user_id).with_for_update()
+            from_shelf_id = (await session.execute(current)).scalar_one_or_none()
+            if from_shelf_id is None:
+                raise BookNotFound
+            destination = select(Shelf.id).where(
+                Shelf.id == values["shelf_id"], Shelf.user_id == user_id
+            ).with_for_update()
+            if (await session.execute(destination)).scalar_one_or_none() is None:
+                raise ShelfNotFound
+        if values:
+            query = update(Book).values(**values).returning(Book)
+        else:
+            query = select(Book)
+        query = query.where(Book.id == book_id, Book.user_id == user_id)
+        result = await session.execute(query)
+        book = result.scalar_one_or_none()
+        if book is None:
+            raise BookNotFound
+        if values:
+            if from_shelf_id is not None and from_shelf_id != book.shelf_id:
+                await counters.move_book(session, from_shelf_id, book)
+            await session.commit()
+            await schedule_invalidation("books", "shelf-stats")
         return book
\ No newline at end of file
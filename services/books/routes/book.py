@@ -1,74 +1,122 @@
-from fastapi import APIRouter, Query, status, HTTPException, Depends
-from fastapi_users import FastAPIUsers
-from services.user.modules.manager import get_user_manager, auth_backend
-from common.errors import EmptyQueryResult
-from dependecies.session import AsyncSessionDep
-from services.books.schemas.book import BookListResponseSchema, BookCreateSchema
+from fastapi import APIRouter, Query, status, HTTPException, Depends, Request
+from services.user.modules.manager import current_active_user
+from common.batching import parse_ids
+from common.errors import EmptyQueryResult, InvalidCursor, InvalidIds
+from common.pagination import get_next_cursor
+from common.totals import CountMode
+from common.responses import cached_response
+from common.serialization import dumps
+from common.compression import compression_levels
+from common.export import ExportFormat, EXPORT_MEDIA_TYPES, stream_export
+from db.database import get_read_session_maker
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from dependecies.session import AsyncSessionDep, AsyncReadSessionDep
+from services.books.schemas.book import BookListResponseSchema, BookCreateSchema, BookBulkResultSchema
+from services.books.modules.bulk import import_books, iter_json_array, iter_ndjson, InvalidBulkPayload
 from models import Book, User
 from pydantic import ValidationError
 from services.books.schemas import BookUpdateSchema
 from services.books.errors import BookNotFound
+from services.shelves.errors import ShelfNotFound
 from typing import Annotated
 from common.schemas import PaginationParams
 from services.books.schemas import BookFilter
 from services.books.query_builder import BookQueryBuilder
-fastapi_users = FastAPIUsers[User, int](
-    get_user_manager,
-    [auth_backend]
-)
-current_active_user = fastapi_users.current_user(active=True)
+
+NDJSON_CONTENT_TYPES = {'application/x-ndjson', 'application/ndjson', 'application/jsonl'}
 
 books_router = APIRouter()
 
 
 @books_router.get("/books", response_model=BookListResponseSchema)
 async def get_books(
-        session: AsyncSessionDep,
+        request: Request,
+        session: AsyncReadSessionDep,
         pagination_params: Annotated[PaginationParams, Depends()],
         book_id: int = Query(None, description="Filter by book ID"),
+        ids: str = Query(None, description="Comma-separated book IDs, resolved in one query"),
         book_name: str = Query(None, description="Filter by book name"),
         name: str = Query(None, description="Filter by book name (partial match)"),
-        user_id:int = Query(None, description='Find books by user id')
+        user_id:int = Query(None, description='Find books by user id'),
+        search: str = Query(None, min_length=1, max_length=100, description="Ranked full-text search over name and description"),
+        count: CountMode = Query(CountMode.none, description="Include an exact or estimated total in listings")
 ):
-    try:
+    async def build_books(session: AsyncSession) -> BookListResponseSchema | bytes:
         if book_id is not None:
             book = await BookQueryBuilder.get_book_by_id(session, book_id)
             return BookListResponseSchema(items=[book])
+        if ids is not None:
+            books = await BookQueryBuilder.get_books_by_ids(session, parse_ids(ids))
+            return BookListResponseSchema(items=books)
         if book_name is not None:
             book = await BookQueryBuilder.get_book_by_name(session, book_name)
             return BookListResponseSchema(items=[book])
         if user_id is not None:
-            books = await BookQueryBuilder.get_book_by_user_id(session, user_id)
-            return  BookListResponseSchema(items=books)
+            books = await BookQueryBuilder.get_books_by_user(session, user_id, pagination_params)
+            return BookListResponseSchema(items=books, next_cursor=get_next_cursor(books, pagination_params))
+        if search is not None:
+            books = await BookQueryBuilder.search_books(session, pagination_params, search)
+            return BookListResponseSchema(items=books)
 
         filters = BookFilter(name=name) if name else None
-        books = await BookQueryBuilder.get_books_pagination(
+        books = await BookQueryBuilder.get_books_pagination_rows(
             session,
             pagination_params,
             filters
         )
-        return BookListResponseSchema(items=books)
+        total, total_is_estimate = await BookQueryBuilder.count_books(session, filters, count)
+        return dumps({
+            "items": [book._asdict() for book in books],
+            "next_cursor": get_next_cursor(books, pagination_params),
+            "total": total,
+            "total_is_estimate": total_is_estimate
+        })
 
+    try:
+        return await cached_response(request, "books", session, build_books)
     except EmptyQueryResult:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No books found matching the criteria"
         )
-    except ValidationError as e:
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    except (ValidationError, InvalidIds) as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 
+@books_router.get("/books/export", dependencies=[Depends(compression_levels(gzip=1, br=1, zstd=1))])
+async def export_books(
+        request: Request,
+        export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format", description="ndjson or csv"),
+        name: str = Query(None, description="Filter by book name (partial match)")
+) -> StreamingResponse:
+    try:
+        filters = BookFilter(name=name) if name else None
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(
+        stream_export(get_read_session_maker(request), BookQueryBuilder.get_books_export_query(filters), export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="books.{export_format.value}"'}
+    )
+
+
 @books_router.get("/users/books")
-async def get_users_shelves(
-        session: AsyncSessionDep,
+async def get_users_books(
+        session: AsyncReadSessionDep,
+        pagination_params: Annotated[PaginationParams, Depends()],
         user: User = Depends(current_active_user)
 ) -> BookListResponseSchema:
     try:
-        books = await BookQueryBuilder.get_books_by_user(session, user.id)
-        return BookListResponseSchema(firstName=user.first_name, secondName=user.second_name, items=books)
+        books = await BookQueryBuilder.get_books_by_user(session, user.id, pagination_params)
+        return BookListResponseSchema(items=books, next_cursor=get_next_cursor(books, pagination_params))
     except EmptyQueryResult:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
 
 
 
@@ -93,6 +141,24 @@ async def add_book(
         )
 
 
+@books_router.post('/books/bulk', status_code=status.HTTP_201_CREATED, response_model=BookBulkResultSchema)
+async def add_books_bulk(
+        request: Request,
+        session: AsyncSessionDep,
+        user: User = Depends(current_active_user)
+) -> BookBulkResultSchema:
+    """Import a JSON array or an NDJSON stream (`application/x-ndjson`) of books."""
+    content_type = request.headers.get('content-type', '').split(';')[0].strip()
+    try:
+        if content_type in NDJSON_CONTENT_TYPES:
+            items = iter_ndjson(request.stream())
+        else:
+            items = iter_json_array(await request.body())
+        return await import_books(session, user.id, items)
+    except InvalidBulkPayload as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @books_router.delete("/books/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_book(
         book_id: int,
@@ -100,7 +166,7 @@ async def delete_book(
         user: User = Depends(current_active_user)
 ):
     try:
-        await BookQueryBuilder.delete_book(session, book_id)
+        await BookQueryBuilder.delete_book(session, book_id, user.id)
     except BookNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,  # Consistent status code usage
@@ -116,9 +182,11 @@ async def update_book(
         user: User = Depends(current_active_user)
 ) -> Book:
     try:
-        return await BookQueryBuilder.update_book(session, book_id, data)
+        return await BookQueryBuilder.update_book(session, book_id, data, user.id)
     except BookNotFound:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
-        )
\ No newline at end of file
+        )
+    except ShelfNotFound:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shelf not found")
\ No newline at end of file
@@ -1,2 +1,2 @@
-from .book import BookListResponseSchema, BookCreateSchema, BookResponseSchema, BookUpdateSchema
+from .book import BookListResponseSchema, BookCreateSchema, BookResponseSchema, BookUpdateSchema, BookBulkResultSchema, BookBulkErrorSchema
 from .filter import BookFilter
\ No newline at end of file
@@ -15,19 +15,34 @@ class BookResponseSchema(SQLModel):
 
 class BookListResponseSchema(SQLModel):
     items: List[BookResponseSchema]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: Optional[bool] = None
 
 
 class BookCreateSchema(SQLModel):
-    name: str
-    description: Optional[str] = None
-    link: Optional[str] = None
+    name: str = Field(max_length=100)
+    description: Optional[str] = Field(default=None, max_length=500)
+    link: Optional[str] = Field(default=None, max_length=500)
     shelf_id: int
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 
+class BookBulkErrorSchema(SQLModel):
+    index: int
+    error: str
+
+
+class BookBulkResultSchema(SQLModel):
+    created: int = 0
+    ids: List[int] = Field(default_factory=list)
+    errors: List[BookBulkErrorSchema] = Field(default_factory=list)
+
+
+
 class BookUpdateSchema(SQLModel):
-    name: Optional[str] = None
-    description: Optional[str] = None
-    link: Optional[str] = None
+    name: Optional[str] = Field(default=None, max_length=100)
+    description: Optional[str] = Field(default=None, max_length=500)
+    link: Optional[str] = Field(default=None, max_length=500)
     shelf_id: Optional[int] = None 
\ No newline at end of file
@@ -0,0 +1 @@
+from .changes import ChangeQueryBuilder, decode_change_token, encode_change_token
@@ -0,0 +1,116 @@
+import base64
+import heapq
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy import ColumnElement, tuple_
+from sqlmodel import select
+
+from common.errors import InvalidCursor
+from dependecies.session import AsyncSessionDep
+from models import Book, Shelf, Tombstone
+from services.changes.schemas import ChangeSchema, ChangeListResponseSchema, ChangedBookSchema, ChangedShelfSchema
+
+ChangeKey = tuple[datetime, int, int]
+
+# Position of each source in the feed order `(changed_at, source, id)`.
+BOOKS, SHELVES, TOMBSTONES = 0, 1, 2
+AFTER_ALL_SOURCES = 3
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Make `value` timezone-aware: asyncpg returns aware timestamps, SQLite naive UTC ones."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def encode_change_token(key: ChangeKey) -> str:
+    changed_at, source, row_id = key
+    payload = json.dumps([changed_at.isoformat(), source, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_change_token(token: str) -> ChangeKey:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        changed_at, source, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _as_utc(datetime.fromisoformat(changed_at)), int(source), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor from e
+
+
+def _after(changed_at: Any, row_id: Any, source: int, since: Optional[ChangeKey]) -> Optional[ColumnElement[bool]]:
+    """Keyset condition for one source, written so it stays a range scan on `(changed_at, id)`."""
+    if since is None:
+        return None
+    since_at, since_source, since_id = since
+    if source > since_source:
+        return changed_at >= since_at
+    if source < since_source:
+        return changed_at > since_at
+    return tuple_(changed_at, row_id) > tuple_(since_at, since_id)
+
+
+class ChangeQueryBuilder:
+    @staticmethod
+    async def get_changes(
+            session: AsyncSessionDep,
+            since: Optional[ChangeKey],
+            limit: int,
+            settle_seconds: float
+    ) -> ChangeListResponseSchema:
+        """Return up to `limit` book and shelf changes after `since`, oldest first.
+
+        Each source is read with its own index range scan and the three
+        ordered streams are merged. Rows newer than `settle_seconds` are left
+        for a later call, so a transaction that commits late cannot slip in
+        behind a token a client already holds.
+        """
+        horizon = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+        sources = (
+            (BOOKS, Book, Book.updated_at),
+            (SHELVES, Shelf, Shelf.updated_at),
+            (TOMBSTONES, Tombstone, Tombstone.deleted_at),
+        )
+        streams, has_more = [], False
+        for source, model, changed_at in sources:
+            query = select(model).where(changed_at <= horizon).order_by(changed_at, model.id).limit(limit + 1)
+            after = _after(changed_at, model.id, source, since)
+            if after is not None:
+                query = query.where(after)
+            rows = list((await session.execute(query)).scalars())
+            has_more = has_more or len(rows) > limit
+            streams.append([((_as_utc(getattr(row, changed_at.key)), source, row.id), row) for row in rows[:limit]])
+
+        merged = list(heapq.merge(*streams, key=lambda item: item[0]))
+        has_more = has_more or len(merged) > limit
+        merged = merged[:limit]
+
+        items = [ChangeQueryBuilder._to_change(key, row, since) for key, row in merged]
+        if merged:
+            last = merged[-1][0]
+        elif since is not None and since[0] > horizon:
+            last = since
+        else:
+            # Nothing is left up to the horizon: move the token there so later calls scan less.
+            last = (horizon, AFTER_ALL_SOURCES, 0)
+        return ChangeListResponseSchema(items=items, next_token=encode_change_token(last), has_more=has_more)
+
+    @staticmethod
+    def _to_change(key: ChangeKey, row: Any, since: Optional[ChangeKey]) -> ChangeSchema:
+        changed_at, source, _ = key
+        if source == TOMBSTONES:
+            return ChangeSchema(kind=row.entity, op="deleted", id=row.entity_id, changed_at=changed_at)
+        # Rows without created_at predate the column; they can only be reported as updates.
+        if since is None:
+            created = True
+        else:
+            created = row.created_at is not None and _as_utc(row.created_at) > since[0]
+        op = "created" if created else "updated"
+        if source == BOOKS:
+            book = ChangedBookSchema.model_validate(row, from_attributes=True)
+            return ChangeSchema(kind="book", op=op, id=row.id, changed_at=changed_at, book=book)
+        shelf = ChangedShelfSchema.model_validate(row, from_attributes=True)
+        return ChangeSchema(kind="shelf", op=op, id=row.id, changed_at=changed_at, shelf=shelf)
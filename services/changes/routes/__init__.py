@@ -0,0 +1 @@
+from .changes import changes_router
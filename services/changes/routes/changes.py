@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from common.compression import compression_levels
+from common.errors import InvalidCursor
+from common.settings import ChangeFeedSettings, get_settings
+from db.database import get_database
+from dependecies.session import AsyncSessionDep
+from services.changes.query_builder import ChangeQueryBuilder, decode_change_token
+from services.changes.schemas import ChangeListResponseSchema
+
+KEEPALIVE = b": keep-alive\n\n"
+
+changes_router = APIRouter()
+
+
+def _decode_since(since: Optional[str]):
+    try:
+        return decode_change_token(since) if since else None
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid change token")
+
+
+# The feed reads from the primary: replica lag could expose a later change before an
+# earlier one and move a client's token past it.
+@changes_router.get("/changes", response_model=ChangeListResponseSchema)
+async def get_changes(
+        session: AsyncSessionDep,
+        since: str = Query(None, description="next_token of the previous call; omit for a full initial sync"),
+        limit: int = Query(None, ge=1, le=5000, description="Maximum number of changes to return")
+) -> ChangeListResponseSchema:
+    settings = get_settings().changes
+    return await ChangeQueryBuilder.get_changes(
+        session, _decode_since(since), limit or settings.page_size, settings.settle_seconds
+    )
+
+
+async def stream_changes(
+        session_maker: async_sessionmaker,
+        since: Optional[str],
+        settings: ChangeFeedSettings
+) -> AsyncIterator[bytes]:
+    """Server-sent events: one `changes` event per page, keyed by its token, until `stream_timeout`.
+
+    Each poll uses a short-lived session, so an idle stream holds no connection.
+    """
+    since_key = decode_change_token(since) if since else None
+    deadline = time.monotonic() + settings.stream_timeout
+    yield f"retry: {int(settings.poll_interval * 1000)}\n\n".encode()
+    while True:
+        async with session_maker() as session:
+            page = await ChangeQueryBuilder.get_changes(
+                session, since_key, settings.page_size, settings.settle_seconds
+            )
+        since_key = decode_change_token(page.next_token)
+        if page.items:
+            yield f"id: {page.next_token}\nevent: changes\ndata: {page.model_dump_json()}\n\n".encode()
+        if page.has_more:
+            continue
+        if time.monotonic() >= deadline:
+            return
+        await asyncio.sleep(settings.poll_interval)
+        if not page.items:
+            yield KEEPALIVE
+
+
+# Events go out uncompressed so proxies and browsers pass each one through as soon as it is written.
+@changes_router.get("/changes/stream", dependencies=[Depends(compression_levels(gzip=0, br=0, zstd=0))])
+async def get_changes_stream(
+        request: Request,
+        since: str = Query(None, description="Token to resume from; Last-Event-ID takes precedence"),
+        last_event_id: str = Header(None)
+) -> StreamingResponse:
+    since = last_event_id or since
+    _decode_since(since)
+    return StreamingResponse(
+        stream_changes(get_database(request).session_maker, since, get_settings().changes),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
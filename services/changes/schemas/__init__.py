@@ -0,0 +1 @@
+from .changes import ChangeSchema, ChangeListResponseSchema, ChangedBookSchema, ChangedShelfSchema
@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from sqlmodel import SQLModel
+
+from services.books.schemas.book import BookResponseSchema
+from services.shelves.schemas.shelf import ShelfResponseSchema
+
+
+class ChangedBookSchema(BookResponseSchema):
+    shelf_id: int
+    user_id: int
+    created_at: Optional[datetime] = None
+    updated_at: datetime
+
+
+class ChangedShelfSchema(ShelfResponseSchema):
+    created_at: Optional[datetime] = None
+    updated_at: datetime
+
+
+class ChangeSchema(SQLModel):
+    kind: Literal["book", "shelf"]
+    op: Literal["created", "updated", "deleted"]
+    id: int
+    changed_at: datetime
+    book: Optional[ChangedBookSchema] = None
+    shelf: Optional[ChangedShelfSchema] = None
+
+
+class ChangeListResponseSchema(SQLModel):
+    items: List[ChangeSchema]
+    next_token: str
+    has_more: bool
@@ -1,2 +1,6 @@
 class ShelfNotFound(Exception):
-    """Exception raised when a Shelf is not found."""
\ No newline at end of file
+    """Exception raised when a Shelf is not found."""
+
+
+class ShelfNotEmpty(Exception):
+    """Exception raised when a Shelf still holds books and cannot be deleted."""
@@ -1,43 +1,73 @@
-from typing import List
+from typing import Iterable, List
 from sqlmodel import select
 
+from common.batching import id_in
+from common.cache import schedule_invalidation
 from common.errors import EmptyQueryResult
+from services.shelves.errors import ShelfNotFound, ShelfNotEmpty
 from dependecies.session import AsyncSessionDep
 from models import Shelf
 from models import Book
-from services.books.query_builder.book import BookQueryBuilder
+from models import Tombstone
+from services.books.modules import counters
 from sqlalchemy.orm import selectinload
 
-from services.shelves.schemas import ShelfUpdateSchema
+from services.shelves.schemas import ShelfUpdateSchema, ShelfResponseSchema
+from services.shelves.schemas.shelf import ShelfWithStatsResponseSchema
 from sqlmodel import select
-from sqlalchemy import Select
+from sqlalchemy import Row, Select, delete, insert, update
 from services.shelves.schemas import ShelfFilter
 from common.schemas import PaginationParams
+from common.pagination import apply_pagination
+from common.totals import CountMode, count_rows
+
+SHELF_RESPONSE_COLUMNS = [getattr(Shelf, field) for field in ShelfResponseSchema.model_fields]
+SHELF_STATS_COLUMNS = [getattr(Shelf, field) for field in ShelfWithStatsResponseSchema.model_fields]
 
 class ShelfQueryBuilder:
     @staticmethod
-    async def get_shelf_pagination(session:AsyncSessionDep, pagination_params:PaginationParams, filters:ShelfFilter) -> Select:
-        query_offset, query_limit = pagination_params.page * pagination_params.size, pagination_params.size
-        select_query = ShelfQueryBuilder.apply_filters(select(Shelf), filters).offset(query_offset).limit(query_limit)
-        result = await session.execute(select_query)
-        shelves = result.scalars().all()
-        if not shelves:
+    async def get_shelf_pagination_rows(
+            session: AsyncSessionDep,
+            pagination_params: PaginationParams,
+            filters: ShelfFilter,
+            with_stats: bool = False
+    ) -> list[Row]:
+        """Fetch only the `ShelfResponseSchema` columns as plain rows, bypassing the identity map.
+
+        With `with_stats`, each row also carries the denormalized `book_count` and
+        `last_book_at` columns, so no `books` rows are read.
+        """
+        select_query = select(*(SHELF_STATS_COLUMNS if with_stats else SHELF_RESPONSE_COLUMNS))
+        select_query = ShelfQueryBuilder.apply_filters(select_query, filters)
+        result = await session.execute(apply_pagination(select_query, Shelf, pagination_params))
+        rows = result.all()
+        if not rows:
             raise EmptyQueryResult
-        return shelves
+        return rows
+
+    @staticmethod
+    async def count_shelves(session: AsyncSessionDep, filters: ShelfFilter, mode: CountMode) -> tuple[int | None, bool | None]:
+        select_query = ShelfQueryBuilder.apply_filters(select(Shelf.id), filters)
+        cache_key = filters.model_dump_json() if filters else None
+        return await count_rows(session, select_query, Shelf.__tablename__, mode, cache_key, filtered=bool(filters))
 
     @staticmethod
     async def get_shelves_by_user(
             session: AsyncSessionDep,
-            user_id: int
+            user_id: int,
+            pagination_params: PaginationParams,
+            with_books: bool = False
     ) -> List[Shelf]:
-        select_query = select(Shelf).options(selectinload(Shelf.user))
+        select_query = apply_pagination(select(Shelf).where(Shelf.user_id == user_id), Shelf, pagination_params)
+        if with_books:
+            select_query = select_query.options(selectinload(Shelf.books))
         query_result = await session.execute(select_query)
         shelves = list(query_result.scalars())
-        
+
         if not shelves:
             raise EmptyQueryResult
         return shelves
-    
+
     @staticmethod
     async def get_shelf_by_id(session: AsyncSessionDep, shelf_id: int) -> Shelf:
         query = select(Shelf).where(Shelf.id == shelf_id)
@@ -47,18 +77,52 @@ class ShelfQueryBuilder:
             raise EmptyQueryResult
         return shelf
 
+    @staticmethod
+    async def get_shelves_by_ids(session: AsyncSessionDep, shelf_ids: list[int]) -> list[Shelf]:
+        """Fetch many shelves with one statement, in the order of `shelf_ids`; missing ids are skipped."""
+        result = await session.execute(select(Shelf).where(id_in(session, Shelf.id, shelf_ids)))
+        shelves = {shelf.id: shelf for shelf in result.scalars()}
+        found = [shelves[shelf_id] for shelf_id in shelf_ids if shelf_id in shelves]
+        if not found:
+            raise EmptyQueryResult
+        return found
+
+    @staticmethod
+    async def get_user_shelf_ids(session: AsyncSessionDep, user_id: int, shelf_ids: Iterable[int]) -> set[int]:
+        """Return the subset of `shelf_ids` owned by the user in a single query."""
+        query = select(Shelf.id).where(Shelf.id.in_(list(shelf_ids)), Shelf.user_id == user_id)
+        result = await session.execute(query)
+        return set(result.scalars())
+
     @staticmethod
     async def add_shelf(session:AsyncSessionDep, shelf:Shelf):
         session.add(shelf)
+        await session.flush()
+        await counters.adjust_shelf_count(session, shelf.user_id, 1)
         await session.commit()
         await session.refresh(shelf)
+        await schedule_invalidation("shelves", "shelf-stats")
         return shelf
 
     @staticmethod
-    async def delete_shelf(session:AsyncSessionDep, shelf_id):
-        shelf = await ShelfQueryBuilder.get_shelf_by_id(session, shelf_id)
-        await session.delete(shelf)
+    async def delete_shelf(session:AsyncSessionDep, shelf_id:int, user_id:int):
+        # Locking the shelf blocks concurrent inserts into it until the emptiness check commits.
+        shelf = select(Shelf.id).where(Shelf.id == shelf_id, Shelf.user_id == user_id).with_for_update()
+        if (await session.execute(shelf)).scalar_one_or_none() is None:
+            raise ShelfNotFound
+        has_books = select(Book.id).where(Book.shelf_id == shelf_id).limit(1)
+        if (await session.execute(has_books)).first() is not None:
+            raise ShelfNotEmpty
+        await session.execute(delete(Shelf).where(Shelf.id == shelf_id))
+        await counters.adjust_shelf_count(session, user_id, -1)
+        await session.execute(insert(Tombstone).values(entity="shelf", entity_id=shelf_id))
         await session.commit()
+        await schedule_invalidation("shelves", "shelf-stats")
+
+    @staticmethod
+    def get_shelves_export_query(filters: ShelfFilter) -> Select:
+        select_query = select(Shelf.id, Shelf.name, Shelf.description, Shelf.created_at, Shelf.user_id)
+        return ShelfQueryBuilder.apply_filters(select_query, filters).order_by(Shelf.id)
 
     @staticmethod
     def apply_filters(select_query: Select, filters: ShelfFilter) -> Select:
@@ -68,26 +132,44 @@ class ShelfQueryBuilder:
 
 
 
+
     @staticmethod
-    async def get_shelf_by_book_id(session:AsyncSessionDep, book_id:int):
-        book =  await BookQueryBuilder.get_book_by_id(session, book_id)
-        if not book:
-            return EmptyQueryResult
-        query = select(Shelf).where(Shelf.id == book.shelf_id)
+    async def get_shelf_by_book_id(session:AsyncSessionDep, book_id:int) -> Shelf:
+        query = select(Shelf).join(Book, Book.shelf_id == Shelf.id).where(Book.id == book_id)
         result = await session.execute(query)
-        shelf = result.scalars().first()
+        shelf = result.scalar_one_or_none()
         if not shelf:
-            return EmptyQueryResult
+            raise EmptyQueryResult
         return shelf
 
-
-
+    @staticmethod
+    async def get_shelves_by_book_ids(session: AsyncSessionDep, book_ids: list[int]) -> list[tuple[int, Shelf]]:
+        """Resolve the shelf of every book in one join, as `(book_id, shelf)` pairs in the order of `book_ids`."""
+        query = (
+            select(Book.id, Shelf)
+            .join(Shelf, Shelf.id == Book.shelf_id)
+            .where(id_in(session, Book.id, book_ids))
+        )
+        result = await session.execute(query)
+        shelves = {book_id: shelf for book_id, shelf in result.tuples()}
+        found = [(book_id, shelves[book_id]) for book_id in book_ids if book_id in shelves]
+        if not found:
+            raise EmptyQueryResult
+        return found
 
     @staticmethod
-    async def update_shelf(session:AsyncSessionDep, shelf_id:int, data:ShelfUpdateSchema):
-        shelf = await ShelfQueryBuilder.get_shelf_by_id(session, shelf_id)
-        for key, value in data.model_dump(exclude_unset=True).items():
-            setattr(shelf, key, value)
+    async def update_shelf(session:AsyncSessionDep, shelf_id:int, data:ShelfUpdateSchema, user_id:int) -> Shelf:
+        values = data.model_dump(exclude_unset=True)
+        if values:
+            query = update(Shelf).values(**values).returning(Shelf)
+        else:
+            query = select(Shelf)
+        query = query.where(Shelf.id == shelf_id, Shelf.user_id == user_id)
+        result = await session.execute(query)
+        shelf = result.scalar_one_or_none()
+        if shelf is None:
+            raise ShelfNotFound
+        if values:
             await session.commit()
-            await session.refresh(shelf)
+            await schedule_invalidation("shelves", "shelf-stats")
         return shelf
\ No newline at end of file
@@ -1,72 +1,152 @@
-from fastapi import APIRouter, status, HTTPException, Query, Depends
+from fastapi import APIRouter, status, HTTPException, Query, Depends, Request
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
-
-from common.errors import EmptyQueryResult
-from dependecies.session import AsyncSessionDep
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.batching import parse_ids
+from common.errors import EmptyQueryResult, InvalidCursor, InvalidIds
+from common.pagination import get_next_cursor
+from common.totals import CountMode
+from common.responses import cached_response
+from common.serialization import dumps
+from common.compression import compression_levels
+from common.export import ExportFormat, EXPORT_MEDIA_TYPES, stream_export
+from db.database import get_read_session_maker
+from dependecies.session import AsyncSessionDep, AsyncReadSessionDep
 from services.shelves.query_builder import ShelfQueryBuilder
 from services.shelves.schemas import ShelfUpdateSchema
-from services.shelves.schemas.shelf import ShelfListResponseSchema, ShelfCreateSchema
+from services.shelves.schemas.shelf import ShelfListResponseSchema, ShelfCreateSchema, ShelfWithBooksListResponseSchema, ShelfWithStatsListResponseSchema
+from services.shelves.schemas.shelf import ShelfForBookSchema, ShelfForBooksListResponseSchema
+from services.books.query_builder import BookQueryBuilder
+from services.books.schemas import BookListResponseSchema
 from models.shelves import Shelf
-from services.shelves.errors import ShelfNotFound
+from services.shelves.errors import ShelfNotFound, ShelfNotEmpty
 from models import User
-from typing import Annotated
+from typing import Annotated, Union
 from common.schemas import PaginationParams
 from services.shelves.schemas import ShelfFilter
-from services.user.modules.manager import auth_backend, get_user_manager
-from fastapi_users import FastAPIUsers
-
-
-fastapi_users = FastAPIUsers[User, int](
-    get_user_manager,
-    [auth_backend]
-)
-current_active_user = fastapi_users.current_user(active=True)
+from services.user.modules.manager import current_active_user
 
 
 
 shelf_router = APIRouter()
 
 
-@shelf_router.get("/shelves", response_model=ShelfListResponseSchema)
+@shelf_router.get("/shelves", response_model=Union[ShelfListResponseSchema, ShelfWithStatsListResponseSchema])
 async def get_shelves(
-        session: AsyncSessionDep,
+        request: Request,
+        session: AsyncReadSessionDep,
         pagination_params: Annotated[PaginationParams, Depends()],
         shelf_id: int = Query(None, description="Filter by shelf ID"),
-        name: str = Query(None, description="Filter by shelf name (partial match)")
+        ids: str = Query(None, description="Comma-separated shelf IDs, resolved in one query"),
+        name: str = Query(None, description="Filter by shelf name (partial match)"),
+        count: CountMode = Query(CountMode.none, description="Include an exact or estimated total in listings"),
+        with_stats: bool = Query(False, description="Include book count and latest book time per shelf")
 ):
-    try:
+    async def build_shelves(session: AsyncSession) -> ShelfListResponseSchema | bytes:
         if shelf_id is not None:
             shelf = await ShelfQueryBuilder.get_shelf_by_id(session, shelf_id)
             return ShelfListResponseSchema(items=[shelf])
+        if ids is not None:
+            shelves = await ShelfQueryBuilder.get_shelves_by_ids(session, parse_ids(ids))
+            return ShelfListResponseSchema(items=shelves)
 
         filters = ShelfFilter(name=name) if name else None
-        shelves = await ShelfQueryBuilder.get_shelf_pagination(
+        shelves = await ShelfQueryBuilder.get_shelf_pagination_rows(
             session,
             pagination_params,
-            filters
+            filters,
+            with_stats
         )
-        return ShelfListResponseSchema(items=shelves)
+        total, total_is_estimate = await ShelfQueryBuilder.count_shelves(session, filters, count)
+        return dumps({
+            "items": [shelf._asdict() for shelf in shelves],
+            "next_cursor": get_next_cursor(shelves, pagination_params),
+            "total": total,
+            "total_is_estimate": total_is_estimate
+        })
 
+    try:
+        return await cached_response(request, "shelf-stats" if with_stats else "shelves", session, build_shelves)
     except EmptyQueryResult:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No shelves found matching the criteria"
         )
-    except ValidationError as e:
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+    except (ValidationError, InvalidIds) as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@shelf_router.get("/shelves/for-books", response_model=ShelfForBooksListResponseSchema)
+async def get_shelves_for_books(
+        session: AsyncReadSessionDep,
+        ids: str = Query(..., description="Comma-separated book IDs")
+) -> ShelfForBooksListResponseSchema:
+    try:
+        pairs = await ShelfQueryBuilder.get_shelves_by_book_ids(session, parse_ids(ids))
+    except InvalidIds as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except EmptyQueryResult:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No shelves found for these books")
+    return ShelfForBooksListResponseSchema(
+        items=[ShelfForBookSchema(book_id=book_id, shelf=shelf) for book_id, shelf in pairs]
+    )
 
-@shelf_router.get("/users/shelves")
+
+@shelf_router.get("/shelves/{shelf_id}/books", response_model=BookListResponseSchema)
+async def get_shelf_books(
+        shelf_id: int,
+        session: AsyncReadSessionDep,
+        pagination_params: Annotated[PaginationParams, Depends()]
+) -> BookListResponseSchema:
+    try:
+        books = await BookQueryBuilder.get_books_by_shelf(session, shelf_id, pagination_params)
+        return BookListResponseSchema(items=books, next_cursor=get_next_cursor(books, pagination_params))
+    except EmptyQueryResult:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No books found on this shelf")
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+@shelf_router.get("/shelves/export", dependencies=[Depends(compression_levels(gzip=1, br=1, zstd=1))])
+async def export_shelves(
+        request: Request,
+        export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format", description="ndjson or csv"),
+        name: str = Query(None, description="Filter by shelf name (partial match)")
+) -> StreamingResponse:
+    try:
+        filters = ShelfFilter(name=name) if name else None
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return StreamingResponse(
+        stream_export(get_read_session_maker(request), ShelfQueryBuilder.get_shelves_export_query(filters), export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="shelves.{export_format.value}"'}
+    )
+
+
+@shelf_router.get(
+    "/users/shelves",
+    response_model=Union[ShelfWithBooksListResponseSchema, ShelfListResponseSchema]
+)
 async def get_users_shelves(
-        session: AsyncSessionDep,
+        session: AsyncReadSessionDep,
+        pagination_params: Annotated[PaginationParams, Depends()],
+        with_books: bool = Query(False, description="Include each shelf's books"),
         user: User = Depends(current_active_user)
-) -> ShelfListResponseSchema:
+):
     try:
-        shelves = await ShelfQueryBuilder.get_shelves_by_user(session, user.id)
-        return ShelfListResponseSchema(firstName=user.first_name, secondName=user.second_name, items=shelves)
+        shelves = await ShelfQueryBuilder.get_shelves_by_user(session, user.id, pagination_params, with_books)
+        next_cursor = get_next_cursor(shelves, pagination_params)
+        if with_books:
+            return ShelfWithBooksListResponseSchema(items=shelves, next_cursor=next_cursor)
+        return ShelfListResponseSchema(items=shelves, next_cursor=next_cursor)
     except EmptyQueryResult:
         raise HTTPException(status_code=status.HTTP_204_NO_CONTENT)
+    except InvalidCursor:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
 
 
 @shelf_router.post("/shelves", status_code=status.HTTP_201_CREATED)
@@ -91,9 +171,11 @@ async def delete_shelf(
         user: User = Depends(current_active_user)
 ):
     try:
-        await ShelfQueryBuilder.delete_shelf(session, shelf_id)
+        await ShelfQueryBuilder.delete_shelf(session, shelf_id, user.id)
     except ShelfNotFound:
         raise HTTPException(status_code=404, detail="Shelf not found")
+    except ShelfNotEmpty:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Shelf still has books")
 
 
 @shelf_router.patch("/shelves/{shelf_id}")
@@ -104,6 +186,6 @@ async def update_shelf(
         user: User = Depends(current_active_user)
 ):
     try:
-        return await ShelfQueryBuilder.update_shelf(session, shelf_id, data)
+        return await ShelfQueryBuilder.update_shelf(session, shelf_id, data, user.id)
     except ShelfNotFound:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shelf not found")
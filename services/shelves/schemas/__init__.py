@@ -1,2 +1,2 @@
-from .shelf import ShelfCreateSchema,ShelfResponseSchema,ShelfListResponseSchema, ShelfUpdateSchema
+from .shelf import ShelfCreateSchema,ShelfResponseSchema,ShelfListResponseSchema, ShelfUpdateSchema, ShelfWithBooksListResponseSchema, ShelfWithStatsListResponseSchema
 from .filter import ShelfFilter
\ No newline at end of file
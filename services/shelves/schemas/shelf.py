@@ -17,6 +17,39 @@ class ShelfResponseSchema(SQLModel):
 
 class ShelfListResponseSchema(SQLModel):
     items: List[ShelfResponseSchema]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: Optional[bool] = None
+
+
+class ShelfWithStatsResponseSchema(ShelfResponseSchema):
+    book_count: int
+    last_book_at: Optional[datetime] = None
+
+
+class ShelfWithStatsListResponseSchema(SQLModel):
+    items: List[ShelfWithStatsResponseSchema]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: Optional[bool] = None
+
+
+class ShelfWithBooksResponseSchema(ShelfResponseSchema):
+    books: List[BookResponseSchema]
+
+
+class ShelfWithBooksListResponseSchema(SQLModel):
+    items: List[ShelfWithBooksResponseSchema]
+    next_cursor: Optional[str] = None
+
+
+class ShelfForBookSchema(SQLModel):
+    book_id: int
+    shelf: ShelfResponseSchema
+
+
+class ShelfForBooksListResponseSchema(SQLModel):
+    items: List[ShelfForBookSchema]
 
 
 class ShelfCreateSchema(SQLModel):
@@ -1,32 +1,229 @@
-from typing import Optional
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, TypeVar
+import asyncio
 import logging
+import multiprocessing
+import os
+import time
 
-from fastapi_users import BaseUserManager, FastAPIUsers
+from fastapi_users import BaseUserManager, FastAPIUsers, exceptions
 from fastapi_users.authentication import BearerTransport, JWTStrategy, AuthenticationBackend
+from fastapi_users.password import PasswordHelper
 from fastapi import Request, Depends
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.orm import make_transient_to_detached
 
-from common.settings import Settings
+from common.cache import TTLCache
+from common.jobs import job_queue
+from common.metrics import registry
+from common.settings import AuthSettings, get_settings
 from dependecies.auth import get_user_db
 from models import User
 
 logger = logging.getLogger(__name__)
 
+user_cache = TTLCache()
+
+
+@job_queue.task("user.registered")
+async def send_welcome(email: str) -> None:
+    logger.info(f"User {email} has registered")
+
+
+# Tokens are short-lived, so these jobs stay in memory rather than in background_jobs.
+@job_queue.task("user.forgot_password", durable=False)
+async def send_reset_password(email: str, token: str) -> None:
+    logger.info(f"User: {email} forgot password. Reset token: {token}")
+
+
+@job_queue.task("user.request_verify", durable=False)
+async def send_verification(email: str, token: str) -> None:
+    logger.info(f"User: {email} sended verification request. token: {token}")
+
+
+def configure_user_cache(settings: AuthSettings) -> None:
+    user_cache.maxsize = settings.user_cache_size
+    user_cache.ttl = settings.user_cache_ttl
+
+
+T = TypeVar("T")
+
+password_helper = PasswordHelper()
+
+password_hash_pending = registry.gauge(
+    "password_hash_pending", "Password hash operations waiting for or running in the executor"
+)
+password_hash_seconds = registry.histogram(
+    "password_hash_seconds", "Wall time of password hash operations including queueing", ["operation"]
+)
+
+
+def _hash(password: str) -> str:
+    return password_helper.hash(password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return password_helper.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs argon2/bcrypt in a thread or process pool so they never block the event loop.
+
+    At most `workers` operations are handed to the pool at once; the rest wait
+    on a semaphore and are reported by the `password_hash_pending` gauge.
+    Until `configure` is called, operations run inline.
+    """
+
+    def __init__(self) -> None:
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+    def configure(self, settings: AuthSettings, app_workers: Optional[int] = None) -> None:
+        """Size the pool to `password_workers`, or to this process's share of the cores among `app_workers`."""
+        self.shutdown()
+        workers = settings.password_workers or max(1, (os.cpu_count() or 1) // (app_workers or 1))
+        if settings.password_executor == "process":
+            # Forking a process that already runs an event loop and driver threads is unsafe.
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=os.nice,
+                initargs=(10,)
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password")
+        self._slots = asyncio.Semaphore(workers)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor, self._slots = None, None
+
+    async def _run(self, operation: str, func: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            return func(*args)
+        started = time.perf_counter()
+        self._pending += 1
+        password_hash_pending.set(self._pending)
+        try:
+            async with self._slots:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            password_hash_pending.set(self._pending)
+            password_hash_seconds.observe(time.perf_counter() - started, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", _hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await self._run("verify", _verify_and_update, plain_password, hashed_password)
+
+
+password_hasher = PasswordHasher()
+
+
 class UserManager(BaseUserManager[User, int]):
-    reset_password_token_secret = Settings().auth.reset_password_token_secret.get_secret_value()
-    verification_token_secret = Settings().auth.verification_token_secret.get_secret_value()
+    @property
+    def reset_password_token_secret(self) -> str:
+        return get_settings().auth.reset_password_token_secret.get_secret_value()
+
+    @property
+    def verification_token_secret(self) -> str:
+        return get_settings().auth.verification_token_secret.get_secret_value()
 
     async def on_after_register(self, user, request: Optional[Request] = None):
-        logger.info(f"User {user.email} has registered")
+        await job_queue.enqueue("user.registered", email=user.email)
 
     async def on_after_forgot_password(
         self, user, token, request: Optional[Request] = None
     ):
-        logger.info(f"User: {user.email} forgot password. Reset token: {token}")
+        await job_queue.enqueue("user.forgot_password", email=user.email, token=token)
 
     async def on_after_request_verify(
         self, user, token, request: Optional[Request] = None
     ):
-        logger.info(f"User: {user.email} sended verification request. token: {token}")
+        await job_queue.enqueue("user.request_verify", email=user.email, token=token)
+
+    async def on_after_update(
+        self, user, update_dict: Dict[str, Any], request: Optional[Request] = None
+    ):
+        user_cache.delete(user.id)
+
+    async def on_after_verify(self, user, request: Optional[Request] = None):
+        user_cache.delete(user.id)
+
+    async def on_after_reset_password(self, user, request: Optional[Request] = None):
+        user_cache.delete(user.id)
+
+    async def on_before_delete(self, user, request: Optional[Request] = None):
+        user_cache.delete(user.id)
+
+    async def on_after_delete(self, user, request: Optional[Request] = None):
+        user_cache.delete(user.id)
+
+    async def get(self, id: int) -> User:
+        """Resolve a user by id, skipping the `users` lookup while a cached row is fresh.
+
+        Cached rows are attached to the request session with `merge(load=False)`,
+        so writes through `user_db` keep working without an extra SELECT.
+        """
+        data = user_cache.get(id)
+        if data is None:
+            user = await super().get(id)
+            user_cache.set(id, user.model_dump())
+            return user
+        user = User(**data)
+        make_transient_to_detached(user)
+        return await self.user_db.session.merge(user, load=False)
+
+    async def create(self, user_create, safe: bool = False, request: Optional[Request] = None) -> User:
+        """`BaseUserManager.create`, with the password hashed off the event loop."""
+        await self.validate_password(user_create.password, user_create)
+
+        existing_user = await self.user_db.get_by_email(user_create.email)
+        if existing_user is not None:
+            raise exceptions.UserAlreadyExists()
+
+        user_dict = user_create.create_update_dict() if safe else user_create.create_update_dict_superuser()
+        user_dict["hashed_password"] = await password_hasher.hash(user_dict.pop("password"))
+
+        created_user = await self.user_db.create(user_dict)
+        await self.on_after_register(created_user, request)
+        return created_user
+
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        """`BaseUserManager.authenticate`, with verification run off the event loop."""
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            user = None
+        # Hand the pooled connection back while the hash runs; sessions keep loaded rows on commit.
+        await self.user_db.session.commit()
+        if user is None:
+            # Still pay for a hash so unknown emails cannot be told apart by timing.
+            await password_hasher.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await password_hasher.verify_and_update(
+            credentials.password, user.hashed_password
+        )
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {key: value for key, value in update_dict.items() if key != "password"}
+            update_dict["hashed_password"] = await password_hasher.hash(password)
+        return await super()._update(user, update_dict)
 
     def parse_id(self, user_id):
         return int(user_id)
@@ -37,9 +234,10 @@ async def get_user_manager(user_db=Depends(get_user_db)):
 
 bearer_transport = BearerTransport(tokenUrl='users/jwt/login')
 
+@lru_cache
 def get_jwt_strategy() -> JWTStrategy:
     return JWTStrategy(
-        secret=Settings().auth.jwt_strategy_token_secret.get_secret_value(), lifetime_seconds=3600
+        secret=get_settings().auth.jwt_strategy_token_secret.get_secret_value(), lifetime_seconds=3600
     )
 
 auth_backend = AuthenticationBackend(
@@ -0,0 +1,81 @@
+"""Fixtures for the tests that run against SQLite.
+
+Each test gets its own database file, seeded with `benchmarks.seed`, and
+`main.app` configured for it through the environment. Password hashing runs
+on threads so the tests do not start a process pool.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+
+SEED = {"users": 2, "shelves_per_user": 2, "books_per_shelf": 3}
+BOOK_TOTAL = SEED["users"] * SEED["shelves_per_user"] * SEED["books_per_shelf"]
+TOKEN_SECRET = "test-secret-long-enough-for-hs256"
+
+
+@pytest.fixture
+def sqlite_database(monkeypatch, tmp_path):
+    environment = {
+        "BE_DEBUG": "false",
+        "BE_DATABASE__DEBUG": "false",
+        "BE_DATABASE__ENGINE": "sqlite+aiosqlite",
+        "BE_DATABASE__DB": str(tmp_path / "test.db"),
+        "BE_AUTH__RESET_PASSWORD_TOKEN_SECRET": TOKEN_SECRET,
+        "BE_AUTH__VERIFICATION_TOKEN_SECRET": TOKEN_SECRET,
+        "BE_AUTH__JWT_STRATEGY_TOKEN_SECRET": TOKEN_SECRET,
+        "BE_AUTH__PASSWORD_EXECUTOR": "thread",
+        "BE_CACHE__BACKEND": "memory",
+    }
+    for name, value in environment.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("BE_SERVER__WORKERS", raising=False)
+
+    from benchmarks.seed import seed
+    from common.settings import get_settings
+    from db.database import Database
+    from services.user.modules.manager import user_cache
+
+    async def create() -> None:
+        database = Database()
+        try:
+            await seed(database, **SEED)
+        finally:
+            await database.dispose()
+
+    get_settings.cache_clear()
+    asyncio.run(create())
+    yield
+    get_settings.cache_clear()
+    user_cache.clear()
+
+
+@pytest.fixture
+def open_client(sqlite_database):
+    """Return a context manager running the app's lifespan around an HTTP client."""
+    from main import app
+
+    @asynccontextmanager
+    async def open_client():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                yield client
+
+    return open_client
+
+
+@pytest.fixture
+def login():
+    """Return a coroutine logging a seeded user in and returning its auth headers."""
+    from benchmarks.seed import SEED_PASSWORD, seed_email
+
+    async def login(client: httpx.AsyncClient, user_index: int = 0) -> dict[str, str]:
+        response = await client.post(
+            "/users/jwt/login", data={"username": seed_email(user_index), "password": SEED_PASSWORD}
+        )
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return login
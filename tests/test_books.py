@@ -0,0 +1,125 @@
+"""Book listings, bulk import and conditional requests against SQLite."""
+import asyncio
+
+from sqlalchemy.exc import DBAPIError
+
+from conftest import BOOK_TOTAL
+
+
+def test_keyset_cursor_walks_every_book_once(open_client):
+    async def run() -> None:
+        async with open_client() as client:
+            ids, params = [], {"size": 5}
+            while True:
+                response = await client.get("/books", params=params)
+                assert response.status_code == 200, response.text
+                page = response.json()
+                ids.extend(item["id"] for item in page["items"])
+                if page["next_cursor"] is None:
+                    break
+                params = {"size": 5, "after": page["next_cursor"]}
+            assert ids == list(range(1, BOOK_TOTAL + 1))
+
+    asyncio.run(run())
+
+
+def test_invalid_cursor_is_a_bad_request(open_client):
+    async def run() -> None:
+        async with open_client() as client:
+            for path in ("/books", "/shelves", "/shelves/1/books"):
+                response = await client.get(path, params={"after": "not-a-cursor"})
+                assert response.status_code == 400, (path, response.text)
+                assert response.json() == {"detail": "Invalid pagination cursor"}
+
+    asyncio.run(run())
+
+
+def test_bulk_import_reports_errors_per_item(open_client, login, monkeypatch):
+    from services.books.query_builder import BookQueryBuilder
+
+    add_books = BookQueryBuilder.add_books
+
+    async def reject_named_bad(session, books):
+        if any(book["name"] == "bad" for book in books):
+            raise DBAPIError("INSERT INTO books", {}, Exception("rejected"))
+        return await add_books(session, books)
+
+    monkeypatch.setattr(BookQueryBuilder, "add_books", staticmethod(reject_named_bad))
+
+    async def run() -> None:
+        async with open_client() as client:
+            headers = await login(client)
+            items = [
+                {"name": "first", "shelf_id": 1},
+                {"name": "x" * 101, "shelf_id": 1},
+                {"name": "other user's shelf", "shelf_id": 3},
+                "not an object",
+                {"name": "bad", "shelf_id": 2},
+                {"name": "last", "shelf_id": 2},
+            ]
+            response = await client.post("/books/bulk", headers=headers, json=items)
+            assert response.status_code == 201, response.text
+            report = response.json()
+            assert report["created"] == 2
+            assert report["ids"] == [BOOK_TOTAL + 1, BOOK_TOTAL + 2]
+            assert [(error["index"], error["error"]) for error in report["errors"]] == [
+                (1, "name: String should have at most 100 characters"),
+                (2, "Shelf 3 not found"),
+                (3, "Item is not a JSON object"),
+                (4, "Rejected by the database"),
+            ]
+
+            ndjson = b'{"name": "streamed", "shelf_id": 1}\n{broken\n'
+            response = await client.post(
+                "/books/bulk", headers={**headers, "Content-Type": "application/x-ndjson"}, content=ndjson
+            )
+            assert response.status_code == 201, response.text
+            assert response.json()["created"] == 1
+            assert response.json()["errors"] == [{"index": 1, "error": "Invalid JSON"}]
+
+            response = await client.post("/books/bulk", headers=headers, json={"name": "not a list"})
+            assert response.status_code == 400
+
+    asyncio.run(run())
+
+
+def test_moving_a_book_needs_an_owned_shelf(open_client, login):
+    async def run() -> None:
+        async with open_client() as client:
+            headers = await login(client)
+            for shelf_id in (3, 999):
+                response = await client.patch("/books/1", headers=headers, json={"shelf_id": shelf_id})
+                assert response.status_code == 404, response.text
+                assert response.json() == {"detail": "Shelf not found"}
+            response = await client.patch("/books/1", headers=headers, json={"shelf_id": 2})
+            assert response.status_code == 200, response.text
+            assert response.json()["shelf_id"] == 2
+
+    asyncio.run(run())
+
+
+def test_etag_answers_304_until_the_listing_changes(open_client, login):
+    async def run() -> None:
+        async with open_client() as client:
+            response = await client.get("/books", params={"size": 5}, headers={"Accept-Encoding": "identity"})
+            assert response.status_code == 200, response.text
+            etag = response.headers["etag"]
+
+            for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+                response = await client.get(
+                    "/books", params={"size": 5}, headers={"If-None-Match": if_none_match}
+                )
+                assert response.status_code == 304, if_none_match
+                assert response.content == b""
+                assert response.headers["etag"] == etag
+
+            headers = await login(client)
+            response = await client.patch("/books/1", headers=headers, json={"name": "renamed"})
+            assert response.status_code == 200, response.text
+
+            response = await client.get("/books", params={"size": 5}, headers={"If-None-Match": etag})
+            assert response.status_code == 200
+            assert response.headers["etag"] != etag
+            assert response.json()["items"][0]["name"] == "renamed"
+
+    asyncio.run(run())
@@ -0,0 +1,67 @@
+"""Response compression negotiation."""
+import asyncio
+
+import pytest
+
+from common.compression import negotiate
+from conftest import BOOK_TOTAL
+
+AVAILABLE = ["zstd", "br", "gzip"]
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("gzip, br, zstd", "zstd"),
+    ("gzip;q=1.0, br;q=0.5", "gzip"),
+    ("GZIP ; q=0.8, deflate", "gzip"),
+    ("zstd;q=0, gzip;q=0.1", "gzip"),
+    ("*", "zstd"),
+    ("*;q=0.5, br;q=0", "zstd"),
+    ("gzip;q=oops, br;q=0.2", "br"),
+])
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding, AVAILABLE) == expected
+
+
+def test_middleware_compresses_large_json_only(open_client):
+    async def run() -> None:
+        async with open_client() as client:
+            response = await client.get("/books", params={"size": 50}, headers={"Accept-Encoding": "identity"})
+            plain, etag = response.content, response.headers["etag"]
+            assert "content-encoding" not in response.headers
+
+            response = await client.get("/books", params={"size": 50}, headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["vary"] == "Accept-Encoding"
+            assert response.headers["etag"] == f"W/{etag}"
+            assert response.content == plain
+
+            response = await client.get(
+                "/books", params={"size": 50}, headers={"Accept-Encoding": "gzip", "If-None-Match": f"W/{etag}"}
+            )
+            assert response.status_code == 304
+            assert "content-encoding" not in response.headers
+
+            response = await client.get("/books", params={"book_id": 1}, headers={"Accept-Encoding": "gzip"})
+            assert response.status_code == 200
+            assert len(response.content) < 1024
+            assert "content-encoding" not in response.headers
+
+    asyncio.run(run())
+
+
+def test_export_is_streamed_with_its_route_level(open_client):
+    async def run() -> None:
+        async with open_client() as client:
+            response = await client.get(
+                "/books/export", params={"format": "ndjson"}, headers={"Accept-Encoding": "gzip"}
+            )
+            assert response.status_code == 200, response.text
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+            assert len(response.content.splitlines()) == BOOK_TOTAL
+
+    asyncio.run(run())
@@ -0,0 +1,81 @@
+"""Denormalized book and shelf counters against SQLite."""
+import asyncio
+
+from sqlalchemy import select, update
+
+from conftest import SEED
+
+
+async def _counters() -> tuple[dict[int, int], dict[int, tuple[int, int]]]:
+    from db.database import Database
+    from models import Shelf, User
+
+    database = Database()
+    try:
+        async with database.session_maker() as session:
+            shelves = dict((await session.execute(select(Shelf.id, Shelf.book_count))).all())
+            users = {
+                row.id: (row.shelf_count, row.book_count)
+                for row in await session.execute(select(User.id, User.shelf_count, User.book_count))
+            }
+    finally:
+        await database.dispose()
+    return shelves, users
+
+
+def test_writes_keep_counters_in_step(open_client, login):
+    books_per_shelf = SEED["books_per_shelf"]
+    books_per_user = SEED["shelves_per_user"] * books_per_shelf
+
+    async def run() -> None:
+        async with open_client() as client:
+            headers = await login(client)
+            assert (await client.post("/books", headers=headers, json={"name": "new", "shelf_id": 1})).status_code == 201
+            response = await client.post(
+                "/books/bulk", headers=headers, json=[{"name": "a", "shelf_id": 2}, {"name": "b", "shelf_id": 2}]
+            )
+            assert response.json()["created"] == 2
+            assert (await client.patch("/books/1", headers=headers, json={"shelf_id": 2})).status_code == 200
+            assert (await client.delete("/books/2", headers=headers)).status_code == 204
+            response = await client.post("/shelves", headers=headers, json={"name": "empty"})
+            assert response.status_code == 201, response.text
+            empty_shelf_id = response.json()["id"]
+
+            response = await client.get("/shelves", params={"with_stats": "true"})
+            book_counts = {shelf["id"]: shelf["book_count"] for shelf in response.json()["items"]}
+            assert book_counts[1] == books_per_shelf - 1
+            assert book_counts[2] == books_per_shelf + 3
+
+            assert (await client.delete("/shelves/1", headers=headers)).status_code == 409
+            assert (await client.delete(f"/shelves/{empty_shelf_id}", headers=headers)).status_code == 204
+
+        shelves, users = await _counters()
+        assert shelves[1] == books_per_shelf - 1
+        assert shelves[2] == books_per_shelf + 3
+        assert users[1] == (SEED["shelves_per_user"], books_per_user + 2)
+        assert users[2] == (SEED["shelves_per_user"], books_per_user)
+
+    asyncio.run(run())
+
+
+def test_reconcile_repairs_drifted_counters(sqlite_database):
+    from db.database import Database
+    from models import Shelf, User
+    from services.books.modules.counters import reconcile_counters
+
+    async def run() -> None:
+        expected = await _counters()
+        database = Database()
+        try:
+            async with database.session_maker() as session:
+                await session.execute(update(Shelf).where(Shelf.id == 2).values(book_count=100))
+                await session.execute(update(User).where(User.id == 1).values(shelf_count=0, book_count=0))
+                await session.commit()
+
+            assert await reconcile_counters(database.session_maker, batch_size=1) == {"shelves": 1, "users": 1}
+            assert await reconcile_counters(database.session_maker) == {"shelves": 0, "users": 0}
+        finally:
+            await database.dispose()
+        assert await _counters() == expected
+
+    asyncio.run(run())
@@ -0,0 +1,104 @@
+"""Durable job leasing on `background_jobs` against SQLite."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select
+
+from common.jobs import JobQueue, SQLJobStore
+from common.settings import JobSettings
+from models.jobs import BackgroundJob
+
+
+async def _add_rows(session_maker, *rows: dict) -> list[int]:
+    async with session_maker() as session:
+        result = await session.execute(
+            insert(BackgroundJob).returning(BackgroundJob.id, sort_by_parameter_order=True),
+            [{"name": "record", "payload": {}, "status": "pending", "lease_until": None, **row} for row in rows]
+        )
+        ids = list(result.scalars())
+        await session.commit()
+    return ids
+
+
+async def _rows(session_maker) -> dict[int, BackgroundJob]:
+    async with session_maker() as session:
+        return {row.id: row for row in (await session.execute(select(BackgroundJob))).scalars()}
+
+
+def test_claim_skips_live_leases(sqlite_database):
+    from db.database import Database
+
+    async def run() -> None:
+        database = Database()
+        store = SQLJobStore(database.session_maker, lease_seconds=60)
+        now = datetime.now(timezone.utc)
+        try:
+            pending, expired, leased, failed = await _add_rows(
+                database.session_maker,
+                {},
+                {"status": "running", "lease_until": now - timedelta(seconds=1)},
+                {"status": "running", "lease_until": now + timedelta(seconds=60)},
+                {"status": "failed"},
+            )
+            assert [job.id for job in await store.claim(1)] == [pending]
+            assert [job.id for job in await store.claim(10)] == [expired]
+            assert await store.claim(10) == []
+
+            await store.release([pending])
+            rows = await _rows(database.session_maker)
+            assert (rows[pending].status, rows[pending].lease_until) == ("pending", None)
+            assert [job.id for job in await store.claim(10)] == [pending]
+
+            before = (await _rows(database.session_maker))[leased].lease_until
+            await store.renew([leased, failed])
+            rows = await _rows(database.session_maker)
+            assert rows[leased].lease_until > before
+            assert rows[failed].lease_until is None
+        finally:
+            await database.dispose()
+
+    asyncio.run(run())
+
+
+def test_workers_share_durable_jobs(sqlite_database):
+    from db.database import Database
+
+    async def run() -> None:
+        database = Database()
+        runs = []
+        queues = []
+        for worker in range(2):
+            queue = JobQueue()
+
+            @queue.task("record")
+            async def record(n: int, worker: int = worker) -> None:
+                runs.append(n)
+
+            queues.append(queue)
+        try:
+            *_, unknown = await _add_rows(
+                database.session_maker,
+                *({"payload": {"n": n}} for n in range(5)),
+                {"name": "retired", "payload": {"n": -1}},
+            )
+            settings = JobSettings(lease_seconds=0.3, retry_backoff=0)
+            for queue in queues:
+                await queue.start(settings, SQLJobStore(database.session_maker, settings.lease_seconds))
+            await queues[0].enqueue("record", n=5)
+
+            for _ in range(50):
+                rows = await _rows(database.session_maker)
+                if list(rows) == [unknown] and rows[unknown].status == "failed":
+                    break
+                await asyncio.sleep(0.05)
+            for queue in queues:
+                await queue.stop(1)
+
+            assert sorted(runs) == list(range(6))
+            rows = await _rows(database.session_maker)
+            assert list(rows) == [unknown]
+            assert (rows[unknown].status, rows[unknown].last_error) == ("failed", "Unknown background job")
+        finally:
+            await database.dispose()
+
+    asyncio.run(run())